@@ -2,19 +2,25 @@ import argparse
 import cv2
 import numpy as np
 from mss import mss
-from IPython.display import display
 import chess
 import time
 import threading
+from typing import Any, Optional
 
 from utils.clicker import MouseClicker
-from utils.interface_utils import ButtonValue
+from utils.interface_utils import ButtonValue, ComponentStatus
 from chess_engine.create_engine import create_chess_engine
 from interface.create_engine import create_interface_engine
 from pieces_detection.create_engine import create_detection_engine
 from speech_recognizer.create_engine import create_speech_recognition_engine
 from utils.common_utils import load_config
 from utils.pieces_detection.chess_board import is_move_valid
+from utils.pieces_detection.frame_change_detector import FrameChangeDetector
+from utils.pieces_detection.board_tracker import BoardTracker
+from utils.pipeline import LatestQueue, PipelineStage
+from utils.chess_engine.game_tracker import GameTracker
+from utils.component_loader import ComponentLoader
+from utils.resource_planner import ResourcePlanner
 
 def run_chess_demo(
         config: dict,
@@ -22,6 +28,10 @@ def run_chess_demo(
         ) -> None:
     '''
     Function to run chess game demo.
+    Capture, detection and analysis run as pipeline stages on their own threads
+    connected by latest-wins queues, so a new position replaces stale work.
+    Models are loaded in background, the speech recognition one only when its mode is selected.
+    CPU cores are split between the detection and the chess engine by the CPU budget.
     
     : param config: (dict) - main config file.
     : param num_monitor: (int) - number of monitor to track.
@@ -43,70 +53,251 @@ def run_chess_demo(
     clicker_config = load_config('../assets/configs/clicker/config.json')
     clicker = MouseClicker(clicker_config)
 
-    detection_model = create_detection_engine(config)
-    chess_engine = create_chess_engine(config)
-    try:
-        speech_recognition_model = create_speech_recognition_engine(config)
-    except Exception as e:
-                print(f"Cannot initialize whisper ASR model. If it is the first time you are launching the program, \
-                    check your Internet connection. This is necessary to load and save model's weights. \
-                    Error message:\n{str(e)}")
+    # thread pools are limited before the models import torch, so they are not sized by all cores
+    planner = ResourcePlanner(config["cpu_budget"])
+    planner.limit_torch_threads()
+    if planner.is_enabled():
+        print(f"CPU budget: {planner.get_plan()}")
+
+    def create_detector() -> Any:
+        # inference thread pools created with the model inherit the affinity of the loading thread
+        planner.pin_current_thread("detection")
+        detector = create_detection_engine(config, planner.get_threads("detection"))
+        planner.limit_torch_threads()
+        return detector
 
-    current_fen = ""
+    def create_engine() -> Any:
+        # the engine process inherits the affinity of the loading thread
+        planner.pin_current_thread("chess_engine")
+        return create_chess_engine(config, planner.get_threads("chess_engine"))
 
-    while True:
+    def create_speech_recognition_model() -> Any:
         try:
-            with threading.Lock():
-                if not program_interface.is_running():
-                    break
-                if program_interface.is_on_pause():
-                    time.sleep(config["seconds_on_pause"])
-                    continue
-                color = program_interface.get_color()
-                program_mode = program_interface.get_program_mode()
-            
-            try:
-                sct_img = np.array(sct.grab(monitor))
-                sct_img = cv2.cvtColor(sct_img, cv2.COLOR_BGRA2BGR)
-            except Exception:
-                print("Cannot grab your monitor. Check your settings.")
-                return
-
-            try:
-                (fen_position, chess_board) = detection_model.detect(sct_img, color)
-            except Exception:
-                print("Cannot recognize the board. Make sure it is on the correct monitor and fully visible.")
-                continue
+            return create_speech_recognition_engine(config)
+        except Exception:
+            print("Cannot initialize whisper ASR model. If it is the first time you are launching the program, "
+                  "check your Internet connection. This is necessary to load and save model's weights.")
+            raise
 
-            if program_mode == ButtonValue.AUTO_MODE:
-                if fen_position != current_fen:
-                    best_move = chess_engine.get_best_move(fen_position)
-                    clicker_coordinates = chess_board.chess_move_to_coordinates(best_move)
-                    clicker.make_move(clicker_coordinates)
-                    time.sleep(config['wait_after_click'])
+    loader = ComponentLoader(on_change=program_interface.set_components_statuses)
+    loader.register("detector", create_detector)
+    loader.register("chess engine", create_engine)
+    loader.register("speech recognition", create_speech_recognition_model, lazy=True)
 
-                current_fen = fen_position
-                time.sleep(config["seconds_between_detections"])
+    change_detector = FrameChangeDetector(config["change_detection"])
+    board_tracker = BoardTracker(config["board_tracking"], monitor)
+    stop_event = threading.Event()
+    frames_queue = LatestQueue()
+    positions_queue = LatestQueue()
+    capture_state = threading.local()
+    detection_state = {"color": None, "key": None}
+    analysis_state = {"color": None, "games": {}, "invalid": set()}
+
+    def wait_component(name: str) -> Optional[Any]:
+        # waits for the component in short steps, so the stages stay responsive to the stop event
+        while not stop_event.is_set():
+            component = loader.get(name, timeout=config["seconds_on_pause"])
+            if component is not None or loader.get_statuses()[name] == ComponentStatus.FAILED:
+                return component
+        return None
 
-            elif program_mode == ButtonValue.SPEECH_RECOGNITION:
-                recorded_audio = speech_recognition_model.record()
-                recognized_text = speech_recognition_model.recognize(recorded_audio)
-                for single_text in recognized_text:
-                    if is_move_valid(single_text):
-                        clicker_coordinates = chess_board.chess_move_to_coordinates(single_text)
-                        clicker.make_move(clicker_coordinates)
-                        time.sleep(config['wait_after_click'])
-                        break
+    def capture(_) -> Optional[dict]:
+        # mss handles cannot be shared between threads, so the stage owns its own one
+        if not hasattr(capture_state, "sct"):
+            capture_state.sct = mss()
 
+        if not program_interface.is_running():
+            stop_event.set()
+            return None
+        if program_interface.is_on_pause():
+            time.sleep(config["seconds_on_pause"])
+            return None
+
+        # the stage is paced before the grab, so the frame goes to detection as soon as it is taken
+        elapsed = time.perf_counter() - getattr(capture_state, "last_grab_time", 0.0)
+        time.sleep(max(config["seconds_between_detections"] - elapsed, 0.0))
+        capture_state.last_grab_time = time.perf_counter()
+
+        # capture only the tracked boards region once the boards are found
+        (offset_x, offset_y) = board_tracker.get_offset()
+        try:
+            sct_img = np.array(capture_state.sct.grab(board_tracker.get_region()))
+            sct_img = cv2.cvtColor(sct_img, cv2.COLOR_BGRA2BGR)
+        except Exception:
+            print("Cannot grab your monitor. Check your settings.")
+            stop_event.set()
+            return None
+
+        return {"image": sct_img,
+                "offset": (offset_x, offset_y),
+                "color": program_interface.get_color(),
+                "mode": program_interface.get_program_mode()}
+
+    def detect(frame: dict) -> Optional[dict]:
+        (offset_x, offset_y) = frame["offset"]
+        if frame["color"] != detection_state["color"]:
+            change_detector.reset()
+            detection_state["color"] = frame["color"]
+            detection_state["key"] = None
+
+        # reuse the previous detection while the boards regions stay the same
+        latest = positions_queue.peek()
+        boards_bboxes = None
+        if latest is not None:
+            offset = np.array([offset_x, offset_y, offset_x, offset_y])
+            boards_bboxes = [chess_board.get_board_bbox() - offset for _, chess_board in latest["positions"]]
+        if not change_detector.has_changed(frame["image"], boards_bboxes):
+            return None
+
+        detection_model = wait_component("detector")
+        if detection_model is None:
+            return None
+        try:
+            positions = detection_model.detect(frame["image"], frame["color"])
+            for _, chess_board in positions:
+                chess_board.translate(offset_x, offset_y)
+        except Exception:
+            change_detector.reset()
+            positions_queue.clear()
+            detection_state["key"] = None
+            # the board is lost inside the tracked region, so re-localize it on the whole monitor
+            if board_tracker.is_tracking():
+                board_tracker.reset()
             else:
+                print("Cannot recognize the board. Make sure it is on the correct monitor and fully visible.")
+            return None
+
+        boards_bboxes = np.array([chess_board.get_board_bbox() for _, chess_board in positions])
+        if board_tracker.update(np.concatenate([boards_bboxes[:, :2].min(axis=0), boards_bboxes[:, 2:].max(axis=0)])):
+            change_detector.reset()
+
+        # only new positions are passed to analysis, so a newer one cancels the stale work
+        key = ([chess_board.get_hash() for _, chess_board in positions], frame["mode"])
+        if key == detection_state["key"] and frame["mode"] != ButtonValue.DETECTION_MODE:
+            return None
+        detection_state["key"] = key
+        # the search of the previous position is useless now, the engine returns its best move so far
+        chess_engine = loader.get("chess engine", timeout=0)
+        if chess_engine is not None:
+            chess_engine.stop_search()
+        return {"positions": positions, "mode": frame["mode"], "color": frame["color"]}
+
+    def is_analysable(board_number: int, fen_position: str, chess_board: Any) -> bool:
+        # positions the repair could not fix are skipped, every one of them is reported once
+        if chess_board.is_valid():
+            return True
+        if fen_position not in analysis_state["invalid"]:
+            analysis_state["invalid"].add(fen_position)
+            print(f"Position {fen_position} on board {board_number + 1} is invalid, it is skipped.")
+        return False
+
+    def analyse(item: dict) -> None:
+        chess_engine = wait_component("chess engine")
+        if chess_engine is None:
+            return None
+        if item["mode"] == ButtonValue.AUTO_MODE:
+            # every board is a separate game
+            if item["color"] != analysis_state["color"]:
+                analysis_state["color"] = item["color"]
+                analysis_state["games"].clear()
+            for board_number, (fen_position, chess_board) in enumerate(item["positions"]):
+                if not is_analysable(board_number, fen_position, chess_board):
+                    continue
+                game = analysis_state["games"].setdefault(board_number, GameTracker(config["game_tracking"]))
+                game.update(fen_position)
+                # the position right after our move waits for the opponent, the engine is pondering on it;
+                # our position is searched until the move is played, so a discarded search is repeated
+                if not game.needs_move():
+                    continue
+
+                (root_fen, moves) = (game.get_root_fen(), game.get_moves())
+                best_move = chess_engine.get_best_move(root_fen, moves)
+                if positions_queue.peek() is not item:
+                    print("Position changed during analysis, the move is discarded.")
+                    return None
+                clicker_coordinates = chess_board.chess_move_to_coordinates(best_move)
+                clicker.make_move(clicker_coordinates)
+                game.mark_move_played()
+                chess_engine.start_pondering(root_fen, best_move, moves)
+                time.sleep(config['wait_after_click'])
+
+        elif item["mode"] == ButtonValue.DETECTION_MODE:
+            for board_number, (fen_position, chess_board) in enumerate(item["positions"]):
+                if not is_analysable(board_number, fen_position, chess_board):
+                    continue
                 best_move = chess_engine.get_best_move(fen_position)
                 board = chess.Board(fen_position)
+                from IPython.display import display
                 display(board)
+        return None
+
+    stages = [PipelineStage("capture", capture, stop_event, output_queue=frames_queue,
+                            initializer=lambda: planner.pin_current_thread("reserved")),
+              PipelineStage("detection", detect, stop_event, input_queue=frames_queue, output_queue=positions_queue,
+                            initializer=lambda: planner.pin_current_thread("detection")),
+              PipelineStage("analysis", analyse, stop_event, input_queue=positions_queue,
+                            initializer=lambda: planner.pin_current_thread("reserved"))]
+    for stage in stages:
+        stage.start()
+
+    # speech recognition waits for the user, so it runs on the main thread with the latest detected positions
+    while not stop_event.is_set():
+        try:
+            if not program_interface.is_running():
+                break
+            latest = positions_queue.peek()
+            if (program_interface.is_on_pause() or latest is None
+                    or program_interface.get_program_mode() != ButtonValue.SPEECH_RECOGNITION):
                 time.sleep(config["seconds_between_detections"])
+                continue
+
+            # the model is loaded on the first selection of the mode
+            speech_recognition_model = loader.get("speech recognition", timeout=config["seconds_on_pause"])
+            if speech_recognition_model is None:
+                # the failed model returns at once, so the loop waits instead of spinning on the CPU
+                if loader.get_statuses()["speech recognition"] == ComponentStatus.FAILED:
+                    time.sleep(config["seconds_on_pause"])
+                continue
+
+            recorded_audio = speech_recognition_model.record()
+            if recorded_audio is None:
+                continue
+            positions = positions_queue.peek()["positions"]
+            # hypotheses are rescored by the moves legal in the detected positions
+            recognized_text = speech_recognition_model.recognize(recorded_audio, [position[0] for position in positions])
+            for single_text in recognized_text:
+                if is_move_valid(single_text):
+                    # the move goes to the first board where it is legal
+                    (_, chess_board) = next((position for position in positions
+                                             if chess.Move.from_uci(single_text) in chess.Board(position[0]).legal_moves),
+                                            positions[0])
+                    clicker_coordinates = chess_board.chess_move_to_coordinates(single_text)
+                    clicker.make_move(clicker_coordinates)
+                    speech_end_time = speech_recognition_model.get_speech_end_time()
+                    if speech_end_time is not None:
+                        print(f"End of speech to click: {(time.perf_counter() - speech_end_time)*1000:.0f} ms")
+                    time.sleep(config['wait_after_click'])
+                    break
 
         except Exception as e:
             print(f"An unknown error occurred. Error message:\n{str(e)}")
 
+    stop_event.set()
+    for stage in stages:
+        stage.join()
+
+    stats = change_detector.get_stats()
+    print(f"Skipped detections: {stats['hits']}, performed detections: {stats['misses']}, hit rate: {stats['hit_rate']:.2f}")
+    print(f"Dropped frames: {frames_queue.dropped}, dropped positions: {positions_queue.dropped}")
+    print(f"Components loading times: {loader.get_load_times()}")
+    chess_engine = loader.get("chess engine", timeout=0)
+    if chess_engine is not None:
+        print(f"Chess engine statistics: {chess_engine.get_stats()}")
+        chess_engine.close()
+    # the lazy model is closed only if it was loaded, so it is not requested at exit
+    if loader.get_statuses()["speech recognition"] == ComponentStatus.READY:
+        loader.get("speech recognition").close()
+
 
 def main():
     parser = argparse.ArgumentParser(description="Run chess game demo")
@@ -0,0 +1,97 @@
+import argparse
+import os
+import time
+import wave
+import numpy as np
+import pyaudio
+import torch
+import torchaudio
+from typing import Callable, List
+from transformers import WhisperProcessor
+
+from utils.common_utils import load_config
+
+
+def measure(function: Callable[[], None], repeats: int) -> List[float]:
+    """
+    Measures time of the function calls.
+
+    : param function: (Callable) - function to call.
+    : param repeats: (int) - number of calls.
+
+    : return: (List[float]) - milliseconds spent on every call.
+    """
+    timings = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start_time) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures audio handling time per voice command '
+                                                 'of the WAV round trip and of the in-memory stream')
+    parser.add_argument('--config', type=str, default='../assets/configs/speech_recognition/whisper_tiny/config.json',
+                        help='path to whisper config')
+    parser.add_argument('--capture_rate', type=int, default=44100, help='sample rate the microphone captures at')
+    parser.add_argument('--repeats', type=int, default=20, help='number of simulated commands')
+    parser.add_argument('--microphone', action='store_true', help='also measure opening and closing the microphone')
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    params = config["model_parameters"]
+    sample_rate = params["sample_rate"]
+    processor = WhisperProcessor.from_pretrained('../assets/models/speech_recognition/' + config["model_name"])
+    # noise stands for a recorded command, the handling time does not depend on the content
+    audio = (np.random.uniform(-0.1, 0.1, int(params["duration"] * args.capture_rate))).astype(np.float32)
+    filename = 'audio_io_benchmark.wav'
+
+    def wav_round_trip() -> None:
+        # the old path: the recording is saved, loaded back and resampled by a new transform
+        with wave.open(filename, 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(args.capture_rate)
+            wf.writeframes((audio * 32767).astype(np.int16).tobytes())
+        waveform, cur_sample_rate = torchaudio.load(filename)
+        os.remove(filename)
+        if cur_sample_rate != sample_rate:
+            waveform = torchaudio.transforms.Resample(orig_freq=cur_sample_rate, new_freq=sample_rate)(waveform)
+        processor(waveform.squeeze().numpy(), sampling_rate=sample_rate, return_tensors="pt")
+
+    resampler = torchaudio.transforms.Resample(orig_freq=args.capture_rate, new_freq=sample_rate)
+
+    def in_memory() -> None:
+        # the new path: samples from the ring buffer go through the cached resampler
+        samples = audio
+        if args.capture_rate != sample_rate:
+            samples = resampler(torch.from_numpy(audio)).numpy()
+        processor(samples, sampling_rate=sample_rate, return_tensors="pt")
+
+    results = {"WAV round trip": measure(wav_round_trip, args.repeats),
+               "in-memory stream": measure(in_memory, args.repeats)}
+
+    if args.microphone:
+        def open_device() -> None:
+            # the old path opened and closed the device for every command
+            audio_interface = pyaudio.PyAudio()
+            stream = audio_interface.open(format=pyaudio.paInt16, channels=params["channels"], rate=args.capture_rate,
+                                          input=True, frames_per_buffer=params["frames_per_buffer"])
+            stream.stop_stream()
+            stream.close()
+            audio_interface.terminate()
+
+        results["microphone open/close"] = measure(open_device, args.repeats)
+
+    for name, timings in results.items():
+        timings = np.array(timings)
+        print(f"{name}: {timings.mean():.1f} ms/command (median {np.median(timings):.1f}, max {timings.max():.1f})")
+    saved = np.mean(results["WAV round trip"]) - np.mean(results["in-memory stream"])
+    if args.microphone:
+        saved += np.mean(results["microphone open/close"])
+    print(f"Saved per command: {saved:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
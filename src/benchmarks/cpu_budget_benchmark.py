@@ -0,0 +1,104 @@
+import argparse
+import multiprocessing
+import random
+import threading
+import time
+import chess
+import numpy as np
+from typing import List
+
+from utils.common_utils import load_config
+from utils.interface_utils import ButtonValue
+from utils.resource_planner import ResourcePlanner
+
+
+def random_position(num_plies: int) -> str:
+    """
+    Makes a position by random moves from the initial one, so the engine cache never answers it.
+
+    : param num_plies: (int) - max number of random moves.
+
+    : return: (str) - FEN of the position.
+    """
+    board = chess.Board()
+    for _ in range(num_plies):
+        moves = list(board.legal_moves)
+        if not moves:
+            break
+        board.push(random.choice(moves))
+    return board.fen()
+
+
+def run_budget(main_config: dict, images_dir: str, repeats: int, enabled: bool) -> List[float]:
+    """
+    Measures detection time per frame while the chess engine searches in background.
+    Runs in its own process, so torch thread pools are sized by this run only.
+
+    : param main_config: (dict) - main config file.
+    : param images_dir: (str) - folder with screenshots to replay.
+    : param repeats: (int) - how many times to replay the folder.
+    : param enabled: (bool) - whether the CPU budget is applied.
+
+    : return: (List[float]) - milliseconds spent on every frame.
+    """
+    planner = ResourcePlanner({**main_config["cpu_budget"], "enabled": enabled})
+    planner.limit_torch_threads()
+
+    # heavy modules are imported after the thread pools are limited
+    from benchmarks.detection_benchmark import load_frames
+    from chess_engine.create_engine import create_chess_engine
+    from pieces_detection.create_engine import create_detection_engine
+
+    planner.pin_current_thread("chess_engine")
+    chess_engine = create_chess_engine(main_config, planner.get_threads("chess_engine"))
+    planner.pin_current_thread("detection")
+    detector = create_detection_engine(main_config, planner.get_threads("detection"))
+    planner.limit_torch_threads()
+    frames = load_frames(images_dir) * repeats
+
+    stop_event = threading.Event()
+
+    def search() -> None:
+        while not stop_event.is_set():
+            chess_engine.get_best_move(random_position(20))
+
+    search_thread = threading.Thread(target=search, daemon=True)
+    search_thread.start()
+
+    timings = []
+    for frame in frames:
+        start_time = time.perf_counter()
+        try:
+            detector.detect(frame, ButtonValue.WHITE)
+        except ValueError:
+            pass
+        timings.append((time.perf_counter() - start_time) * 1000)
+
+    stop_event.set()
+    search_thread.join()
+    chess_engine.close()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures detection frame latency under the chess engine load '
+                                                 'with and without the CPU budget')
+    parser.add_argument('--config', type=str, default='../assets/configs/main.json', help='path to main config')
+    parser.add_argument('--images', type=str, required=True, help='folder with screenshots to replay')
+    parser.add_argument('--repeats', type=int, default=3, help='how many times to replay the folder')
+    args = parser.parse_args()
+
+    main_config = load_config(args.config)
+    # every run gets a fresh process, torch thread pools cannot be resized after they are started
+    context = multiprocessing.get_context("spawn")
+    for name, enabled in (("without budget", False), ("with budget", True)):
+        with context.Pool(1) as pool:
+            timings = pool.apply(run_budget, (main_config, args.images, args.repeats, enabled))
+        # the first frame is excluded to measure the steady state only
+        steady = np.array(timings[1:] if len(timings) > 1 else timings)
+        print(f"{name}: {steady.mean():.1f} ms/frame (std {steady.std():.1f}, p95 {np.percentile(steady, 95):.1f}, "
+              f"max {steady.max():.1f}) over {len(steady)} frames")
+
+
+if __name__ == '__main__':
+    main()
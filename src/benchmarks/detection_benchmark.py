@@ -0,0 +1,72 @@
+import argparse
+import glob
+import os
+import time
+import cv2
+import numpy as np
+from typing import List
+
+from pieces_detection.mmdetection.pieces_detection_mmdetection import PiecesDetectionMMDetection
+from utils.common_utils import load_config
+from utils.interface_utils import ButtonValue
+
+
+def load_frames(images_dir: str) -> List[np.ndarray]:
+    """
+    Loads replay frames from a folder.
+
+    : param images_dir: (str) - folder with .png/.jpg screenshots.
+
+    : return: (List[numpy.ndarray]) - loaded BGR frames.
+    """
+    paths = sorted(glob.glob(os.path.join(images_dir, '*.png')) + glob.glob(os.path.join(images_dir, '*.jpg')))
+    if not paths:
+        raise ValueError(f"No images found in {images_dir}.")
+    return [cv2.imread(path) for path in paths]
+
+
+def run_frames(config: dict, frames: List[np.ndarray], reload_per_frame: bool) -> List[float]:
+    """
+    Runs detection over the given frames and measures time per frame.
+
+    : param config: (dict) - pieces detection config.
+    : param frames: (List[numpy.ndarray]) - frames to process.
+    : param reload_per_frame: (bool) - whether to build a new model for every frame (the old behaviour).
+
+    : return: (List[float]) - milliseconds spent on every frame.
+    """
+    timings = []
+    detector = None if reload_per_frame else PiecesDetectionMMDetection(config)
+    for frame in frames:
+        start_time = time.perf_counter()
+        if reload_per_frame:
+            detector = PiecesDetectionMMDetection({**config, "warm_up": False})
+        try:
+            detector.detect(frame, ButtonValue.WHITE)
+        except ValueError:
+            pass
+        timings.append((time.perf_counter() - start_time) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures steady-state detection time per frame')
+    parser.add_argument('--config', type=str, default='../assets/configs/pieces_detection/mmdetection/config.json',
+                        help='path to pieces detection config')
+    parser.add_argument('--images', type=str, required=True, help='folder with screenshots to replay')
+    parser.add_argument('--repeats', type=int, default=3, help='how many times to replay the folder')
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    frames = load_frames(args.images) * args.repeats
+
+    for name, reload_per_frame in (("model per frame", True), ("persistent model", False)):
+        timings = run_frames(config, frames, reload_per_frame)
+        # the first frame is excluded to measure the steady state only
+        steady = np.array(timings[1:] if len(timings) > 1 else timings)
+        print(f"{name}: {steady.mean():.1f} ms/frame (median {np.median(steady):.1f}, max {steady.max():.1f}) "
+              f"over {len(steady)} frames")
+
+
+if __name__ == '__main__':
+    main()
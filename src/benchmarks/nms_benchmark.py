@@ -0,0 +1,92 @@
+import argparse
+import copy
+import time
+import numpy as np
+
+from utils.pieces_detection.detection_utils import filter_detections, intersection_over_union
+
+
+def legacy_filter_detections(raw_result: dict, iou_threshold: float, score_threshold: float) -> dict:
+    """
+    Pairwise python implementation of filter_detections, kept as a reference for the benchmark.
+
+    : param raw_result: (dict) - raw predictions got from the model.
+    : param iou_threshold: (float) - max value of iou that is allowed in predictions.
+    : param score_threshold: (float) - min score value that is allowed in predictions.
+
+    : return: (dict) - selected predictions in the same format as input values.
+    """
+    num_predictions = len(raw_result['predictions'][0]['scores'])
+    bboxes = np.array(raw_result['predictions'][0]['bboxes'])
+    scores = np.array(raw_result['predictions'][0]['scores'])
+    labels = np.array(raw_result['predictions'][0]['labels'])
+
+    for i in range(num_predictions):
+        for j in range(i+1, num_predictions):
+            if intersection_over_union(bboxes[i], bboxes[j]) > iou_threshold:
+                if scores[i] < scores[j]:
+                    scores[i] = 0.0
+                else:
+                    scores[j] = 0.0
+
+    mask = scores >= score_threshold
+    result = raw_result.copy()
+    result['predictions'][0]['labels'] = labels[mask]
+    result['predictions'][0]['scores'] = scores[mask]
+    result['predictions'][0]['bboxes'] = bboxes[mask]
+    return result
+
+
+def make_raw_result(num_boxes: int, rng: np.random.Generator) -> dict:
+    """
+    Generates a synthetic DetInferencer output: one board box and jittered piece boxes on an 8x8 grid.
+
+    : param num_boxes: (int) - number of raw boxes.
+    : param rng: (numpy.random.Generator) - random generator.
+
+    : return: (dict) - raw predictions in DetInferencer format.
+    """
+    square = 100.0
+    cells = rng.integers(0, 8, size=(num_boxes - 1, 2))
+    jitter = rng.normal(0, 8, size=(num_boxes - 1, 4))
+    pieces = np.concatenate([cells * square, (cells + 1) * square], axis=1) + jitter
+    bboxes = np.concatenate([[[0.0, 0.0, 8 * square, 8 * square]], pieces])
+    scores = rng.uniform(0.0, 1.0, size=num_boxes)
+    labels = np.concatenate([[14], rng.integers(2, 14, size=num_boxes - 1)])
+    return {'predictions': [{'bboxes': bboxes.tolist(), 'scores': scores.tolist(), 'labels': labels.tolist()}],
+            'visualization': []}
+
+
+def measure(function, raw_result: dict, repeats: int) -> float:
+    """
+    Measures mean execution time of a filtering function.
+
+    : return: (float) - mean time in milliseconds.
+    """
+    start_time = time.perf_counter()
+    for _ in range(repeats):
+        function(copy.deepcopy(raw_result))
+    return (time.perf_counter() - start_time) * 1000 / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares pairwise and vectorized detections filtering')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 300, 1000], help='numbers of raw boxes')
+    parser.add_argument('--repeats', type=int, default=5, help='repeats per size')
+    parser.add_argument('--iou_threshold', type=float, default=0.1)
+    parser.add_argument('--score_threshold', type=float, default=0.3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for num_boxes in args.sizes:
+        raw_result = make_raw_result(num_boxes, rng)
+        legacy_time = measure(lambda r: legacy_filter_detections(r, args.iou_threshold, args.score_threshold),
+                              raw_result, args.repeats)
+        vectorized_time = measure(lambda r: filter_detections(r, args.iou_threshold, args.score_threshold, board_label=14),
+                                  raw_result, args.repeats)
+        print(f"{num_boxes:5d} boxes: pairwise {legacy_time:9.2f} ms, vectorized {vectorized_time:7.2f} ms, "
+              f"speedup x{legacy_time / vectorized_time:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+import argparse
+import time
+import cv2
+import numpy as np
+from typing import List, Tuple
+
+from pieces_detection.onnx.pieces_detection_onnx import PiecesDetectionONNX
+from utils.common_utils import load_config
+from utils.interface_utils import ButtonValue
+from utils.pieces_detection.chess_board import detections_to_positions
+from utils.pieces_detection.detection_utils import iou_matrix
+from utils.pieces_detection.onnx_quantization import load_coco_dataset
+
+
+def average_precision(predictions: List[Tuple[np.ndarray, np.ndarray, np.ndarray]],
+                      ground_truth: List[Tuple[np.ndarray, np.ndarray]],
+                      iou_threshold: float) -> float:
+    """
+    Calculates mean over classes of 101-point interpolated average precision.
+
+    : param predictions: (List[Tuple]) - labels, scores and bboxes predicted for every image.
+    : param ground_truth: (List[Tuple]) - labels and bboxes of every image.
+    : param iou_threshold: (float) - min iou for a prediction to match ground truth.
+
+    : return: (float) - mean average precision.
+    """
+    classes = np.unique(np.concatenate([labels for labels, _ in ground_truth]))
+    precisions = []
+    for label in classes:
+        matches, scores, num_ground_truth = [], [], 0
+        for (pred_labels, pred_scores, pred_bboxes), (gt_labels, gt_bboxes) in zip(predictions, ground_truth):
+            pred_mask, gt_mask = pred_labels == label, gt_labels == label
+            num_ground_truth += gt_mask.sum()
+            order = np.argsort(-pred_scores[pred_mask])
+            ious = iou_matrix(pred_bboxes[pred_mask][order], gt_bboxes[gt_mask])
+            matched = np.zeros(gt_mask.sum(), dtype=np.bool_)
+            for row in ious:
+                candidates = np.flatnonzero((row >= iou_threshold) & ~matched)
+                if len(candidates):
+                    matched[candidates[row[candidates].argmax()]] = True
+                matches.append(len(candidates) > 0)
+            scores.extend(pred_scores[pred_mask][order])
+
+        order = np.argsort(-np.array(scores))
+        true_positives = np.cumsum(np.array(matches, dtype=np.float32)[order])
+        recall = true_positives / max(num_ground_truth, 1)
+        precision = true_positives / np.arange(1, len(true_positives) + 1)
+        precision = np.maximum.accumulate(precision[::-1])[::-1] if len(precision) else precision
+        points = [precision[recall >= point].max() if (recall >= point).any() else 0.0 for point in np.linspace(0, 1, 101)]
+        precisions.append(np.mean(points))
+
+    return float(np.mean(precisions))
+
+
+def evaluate(config: dict, dataset: list, board_config: dict) -> dict:
+    """
+    Runs the model over the dataset and collects metrics.
+
+    : param config: (dict) - ONNX pieces detection config.
+    : param dataset: (list) - image paths with ground truth labels and bboxes.
+    : param board_config: (dict) - chess board configuration object.
+
+    : return: (dict) - mAP@0.5, mAP@0.5:0.95, FEN exact-match rate and ms/frame.
+    """
+    model = PiecesDetectionONNX(config)
+    predictions, ground_truth, timings, fen_matches = [], [], [], []
+    for image_path, gt_labels, gt_bboxes in dataset:
+        image = cv2.imread(image_path)
+        start_time = time.perf_counter()
+        result = model.predict(image)['predictions'][0]
+        timings.append((time.perf_counter() - start_time) * 1000)
+
+        predictions.append((np.asarray(result['labels']), np.asarray(result['scores']), np.asarray(result['bboxes'])))
+        ground_truth.append((gt_labels, gt_bboxes))
+
+        fens = []
+        for labels, bboxes in ((result['labels'], result['bboxes']), (gt_labels, gt_bboxes)):
+            try:
+                fens.append([fen for fen, _ in detections_to_positions(board_config, labels, bboxes, ButtonValue.WHITE)])
+            except ValueError:
+                fens.append(None)
+        fen_matches.append(fens[0] == fens[1])
+
+    return {
+        "mAP@0.5": average_precision(predictions, ground_truth, 0.5),
+        "mAP@0.5:0.95": np.mean([average_precision(predictions, ground_truth, threshold)
+                                 for threshold in np.linspace(0.5, 0.95, 10)]),
+        "FEN exact match": float(np.mean(fen_matches)),
+        "ms/frame": float(np.mean(timings[1:] if len(timings) > 1 else timings)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares float and INT8 ONNX pieces detection models')
+    parser.add_argument('--config', type=str, default='../assets/configs/pieces_detection/onnx/config.json',
+                        help='path to ONNX pieces detection config')
+    parser.add_argument('--annotations', type=str, required=True, help='path to COCO json of the evaluation split')
+    parser.add_argument('--images', type=str, required=True, help='folder with evaluation images')
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    board_config = load_config(config["chess_board_config"])
+    dataset = load_coco_dataset(args.annotations, args.images, board_config)
+
+    # metrics are computed on predictions after the production score threshold and NMS
+    reports = {precision: evaluate({**config, "precision": precision}, dataset, board_config)
+               for precision in ("float", "int8")}
+
+    print(f"{'metric':<16}{'float':>10}{'int8':>10}")
+    for metric in reports["float"]:
+        print(f"{metric:<16}{reports['float'][metric]:>10.3f}{reports['int8'][metric]:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+import argparse
+import glob
+import multiprocessing
+import os
+import time
+import numpy as np
+import psutil
+from typing import Dict, List, Tuple
+
+from utils.common_utils import load_config
+
+
+def load_commands(audio_dir: str, sample_rate: int) -> List[Tuple[str, np.ndarray]]:
+    """
+    Loads recorded voice commands from a folder and resamples them to the model rate.
+
+    : param audio_dir: (str) - folder with .wav recordings, a name may start with the said move, e.g. e2e4_1.wav.
+    : param sample_rate: (int) - sample rate of the model.
+
+    : return: (List[Tuple[str, numpy.ndarray]]) - file names with mono float32 samples.
+    """
+    import torchaudio
+    paths = sorted(glob.glob(os.path.join(audio_dir, '*.wav')))
+    if not paths:
+        raise ValueError(f"No recordings found in {audio_dir}.")
+    commands = []
+    for path in paths:
+        waveform, cur_sample_rate = torchaudio.load(path)
+        if cur_sample_rate != sample_rate:
+            waveform = torchaudio.functional.resample(waveform, cur_sample_rate, sample_rate)
+        commands.append((os.path.basename(path), waveform.mean(dim=0).numpy()))
+    return commands
+
+
+def run_backend(recognition_type: str, audio_dir: str) -> Dict[str, object]:
+    """
+    Recognizes the commands with one backend in its own process, so memory of the others is not counted.
+
+    : param recognition_type: (str) - whisper recognition type registered in create_speech_recognition_engine.
+    : param audio_dir: (str) - folder with the recordings.
+
+    : return: (Dict[str, object]) - transcripts by file name, real-time factor, load time and memory in MB.
+    """
+    from speech_recognizer.create_engine import create_speech_recognition_engine
+
+    process = psutil.Process()
+    start_memory = process.memory_info().rss
+    start_time = time.perf_counter()
+    model = create_speech_recognition_engine({"speech_recognition": {"recognition_type": recognition_type}})
+    load_time = time.perf_counter() - start_time
+    model_memory = process.memory_info().rss - start_memory
+
+    sample_rate = load_config(f'../assets/configs/speech_recognition/{recognition_type}/config.json')["model_parameters"]["sample_rate"]
+    commands = load_commands(audio_dir, sample_rate)
+    transcripts = {}
+    processing_time, audio_time = 0.0, 0.0
+    for name, samples in commands:
+        start_time = time.perf_counter()
+        transcripts[name] = model.recognize(samples)
+        processing_time += time.perf_counter() - start_time
+        audio_time += len(samples) / sample_rate
+
+    return {"transcripts": transcripts,
+            "rtf": processing_time / audio_time,
+            "load_time": load_time,
+            "model_memory": model_memory / 2**20,
+            "peak_memory": process.memory_info().rss / 2**20}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares real-time factor, memory and transcripts '
+                                                 'of speech recognition backends on recorded commands')
+    parser.add_argument('--audio', type=str, required=True, help='folder with .wav recordings of voice commands')
+    parser.add_argument('--backends', type=str, nargs='+', default=['whisper_tiny', 'whisper_tiny_int8'],
+                        help='recognition types to compare, the first one is the reference')
+    args = parser.parse_args()
+
+    # every backend gets a fresh process to measure its memory alone
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for backend in args.backends:
+        with context.Pool(1) as pool:
+            results[backend] = pool.apply(run_backend, (backend, args.audio))
+
+    reference = results[args.backends[0]]["transcripts"]
+    for backend, result in results.items():
+        transcripts = result["transcripts"]
+        top = {name: texts[0] if texts else "" for name, texts in transcripts.items()}
+        agreement = np.mean([top[name] == (reference[name][0] if reference[name] else "") for name in top])
+        # the said move is known if the file name starts with it
+        labelled = [name for name in top if len(name.split('_')[0]) in (4, 5)]
+        accuracy = np.mean([top[name] == name.split('_')[0].lower() for name in labelled]) if labelled else float('nan')
+        print(f"{backend}: RTF {result['rtf']:.3f}, load {result['load_time']:.2f} s, "
+              f"model memory {result['model_memory']:.0f} MB (peak RSS {result['peak_memory']:.0f} MB), "
+              f"agreement with {args.backends[0]} {agreement:.2%}, accuracy {accuracy:.2%} over {len(labelled)} labelled")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+import argparse
+import time
+import numpy as np
+
+from benchmarks.detection_benchmark import load_frames
+from pieces_detection.mmdetection.pieces_detection_mmdetection import PiecesDetectionMMDetection
+from pieces_detection.square_classifier.pieces_detection_square_classifier import PiecesDetectionSquareClassifier
+from utils.common_utils import load_config
+from utils.interface_utils import ButtonValue
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares latency of RTMDet and square classifier on replayed frames')
+    parser.add_argument('--config', type=str, default='../assets/configs/pieces_detection/square_classifier/config.json',
+                        help='path to square classifier config')
+    parser.add_argument('--images', type=str, required=True, help='folder with consecutive screenshots of one game')
+    parser.add_argument('--color', type=str, default=ButtonValue.WHITE, help='color which user plays')
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    frames = load_frames(args.images)
+    detector = PiecesDetectionMMDetection(load_config(config["fallback_config"]))
+    classifier = PiecesDetectionSquareClassifier(config)
+
+    results = {}
+    for name, model in (("rtmdet", detector), ("square classifier", classifier)):
+        timings, fens = [], []
+        for frame in frames:
+            start_time = time.perf_counter()
+            try:
+                fens.append([fen for fen, _ in model.detect(frame, args.color)])
+            except ValueError:
+                fens.append(None)
+            timings.append((time.perf_counter() - start_time) * 1000)
+        results[name] = fens
+        print(f"{name}: {np.mean(timings):.1f} ms/frame (median {np.median(timings):.1f}, max {np.max(timings):.1f})")
+
+    agreement = np.mean([a == b for a, b in zip(results["rtmdet"], results["square classifier"])])
+    stats = classifier.get_stats()
+    print(f"FEN agreement: {agreement:.3f}, fallback rate: {stats['fallback_rate']:.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import List, Optional
 
 class ChessEngineBase(ABC):
     '''Base class for chess engine.'''
@@ -6,5 +7,21 @@ class ChessEngineBase(ABC):
         self._config = config
 
     @abstractmethod
-    def get_best_move(self, fen_position: str) -> str:
+    def get_best_move(self, fen_position: str, moves: Optional[List[str]] = None) -> str:
         '''Analisys logic.'''
+
+    def get_stats(self) -> dict:
+        '''Gets engine statistics.'''
+        return {}
+
+    def stop_search(self) -> None:
+        '''Stops the running search if the engine supports it.'''
+
+    def start_pondering(self, fen_position: str, move: str, moves: Optional[List[str]] = None) -> None:
+        '''Starts searching the expected reply to the played move if the engine supports it.'''
+
+    def set_remaining_time(self, remaining_time: Optional[float]) -> None:
+        '''Sets the remaining clock for engines managing their search time.'''
+
+    def close(self) -> None:
+        '''Releases engine resources.'''
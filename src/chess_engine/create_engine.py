@@ -1,16 +1,33 @@
 from chess_engine.chess_engine_base import ChessEngineBase
 from chess_engine.stockfish.chess_engine_stockfish import ChessEngineStockfish
+from chess_engine.uci.chess_engine_uci import ChessEngineUCI
+from chess_engine.probe.chess_engine_probe import ChessEngineProbe
+from typing import Optional
 from utils.common_utils import load_config
 
-def create_chess_engine(config: dict) -> ChessEngineBase:
+def create_chess_engine(config: dict, threads: Optional[int] = None) -> ChessEngineBase:
     '''
     Creates an instance of the chess_engine engine based on config.
     
     : param config: (dict) - main config file.
+    : param threads: (Optional[int]) - number of engine threads planned by the CPU budget, threads_percent is used if None.
     
     : return: (ChessEngineBase) - instance of the chess_engine engine.
     '''
 
     if config["chess_engine"]["engine_type"] == "stockfish":
         stockfish_config = load_config('../assets/configs/chess_engine/stockfish/config.json')
-        return ChessEngineStockfish(stockfish_config)
\ No newline at end of file
+        stockfish_config["threads"] = threads or stockfish_config["threads"]
+        engine = ChessEngineStockfish(stockfish_config)
+    elif config["chess_engine"]["engine_type"] == "uci":
+        uci_config = load_config('../assets/configs/chess_engine/uci/config.json')
+        uci_config["threads"] = threads or uci_config["threads"]
+        engine = ChessEngineUCI(uci_config)
+    else:
+        raise ValueError(f"Unknown chess engine type: {config['chess_engine']['engine_type']}.")
+
+    # known opening and endgame positions are answered without the search
+    probe_config = load_config('../assets/configs/chess_engine/probe/config.json')
+    if probe_config["enabled"]:
+        return ChessEngineProbe(probe_config, engine)
+    return engine
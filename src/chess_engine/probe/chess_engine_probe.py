@@ -0,0 +1,153 @@
+import os
+import chess
+import chess.polyglot
+import chess.syzygy
+from typing import List, Optional
+
+from chess_engine.chess_engine_base import ChessEngineBase
+from utils.common_utils import find_file_except_extension
+from utils.chess_engine.game_tracker import make_board
+
+class ChessEngineProbe(ChessEngineBase):
+    '''
+    Class for chess engine answering known positions from Polyglot opening book and Syzygy endgame tablebases.
+    The wrapped engine searches only the positions missed by both probes.
+    '''
+
+    def __init__(self, config: dict, engine: ChessEngineBase) -> None:
+        '''
+        Initializes an instance of ChessEngineProbe.
+
+        : param config: (dict) - probe configuration object.
+        : param engine: (ChessEngineBase) - engine searching positions missed by the probes.
+
+        : return: (None) - this function does not return any value.
+        '''
+        super().__init__(config)
+        self._engine = engine
+        self._book = None
+        self._tablebase = None
+
+        book_path = find_file_except_extension(config["book_path"], '.txt')
+        if book_path is not None:
+            self._book = chess.polyglot.open_reader(book_path)
+        else:
+            print("Opening book is not found, the book probe is disabled.")
+
+        if os.path.isdir(config["syzygy_path"]):
+            self._tablebase = chess.syzygy.open_tablebase(config["syzygy_path"])
+        if self._tablebase is None or not self._tablebase.wdl:
+            print("Syzygy tablebases are not found, the tablebase probe is disabled.")
+            self._tablebase = None
+
+        self.book_hits = 0
+        self.tablebase_hits = 0
+        self.engine_calls = 0
+
+    def _probe_book(self, board: chess.Board) -> Optional[chess.Move]:
+        '''
+        Looks the position up in the opening book.
+
+        : param board: (chess.Board) - position with full castling and en passant information.
+
+        : return: (Optional[chess.Move]) - book move or None if the position is not in the book.
+        '''
+        if self._book is None:
+            return None
+        try:
+            if self._config["book_selection"] == "weighted":
+                return self._book.weighted_choice(board).move
+            return self._book.find(board).move
+        except IndexError:
+            return None
+
+    def _probe_tablebase(self, board: chess.Board) -> Optional[chess.Move]:
+        '''
+        Finds the best move by the tablebases: the best WDL outcome, then the fastest win or the slowest loss.
+
+        : param board: (chess.Board) - position to probe.
+
+        : return: (Optional[chess.Move]) - best move or None if the position is not in the tablebases.
+        '''
+        if (self._tablebase is None or chess.popcount(board.occupied) > self._config["syzygy_max_pieces"]
+                or board.castling_rights):
+            return None
+
+        best_move, best_key = None, None
+        try:
+            for move in board.legal_moves:
+                board.push(move)
+                if board.is_checkmate():
+                    board.pop()
+                    return move
+                # values are from the opponent side: a lower dtz of the losing opponent means a faster win
+                key = (-self._tablebase.probe_wdl(board), self._tablebase.probe_dtz(board))
+                board.pop()
+                if best_key is None or key > best_key:
+                    best_move, best_key = move, key
+        except KeyError:
+            return None
+        return best_move
+
+    def get_best_move(self, fen_position: str, moves: Optional[List[str]] = None) -> str:
+        '''
+        Processes the input FEN-position with the probes, using the wrapped engine if both of them miss.
+
+        : param fen_position: (str) - input FEN-position to process.
+        : param moves: (Optional[List[str]]) - moves played since fen_position in UCI format.
+
+        : return: (str) - the best move suggestion.
+        '''
+        board = make_board(fen_position, moves)
+        best_move = self._probe_book(board)
+        if best_move is not None:
+            self.book_hits += 1
+        else:
+            best_move = self._probe_tablebase(board)
+            if best_move is not None:
+                self.tablebase_hits += 1
+
+        if best_move is None:
+            self.engine_calls += 1
+            return self._engine.get_best_move(fen_position, moves)
+
+        if board.turn == chess.WHITE:
+            print("The best move for white is:", best_move.uci())
+        else:
+            print("The best move for black is:", best_move.uci())
+        return best_move.uci()
+
+    def get_stats(self) -> dict:
+        '''
+        Gets hits of every probe and statistics of the wrapped engine.
+
+        : return: (dict) - book hits, tablebase hits, engine calls and the wrapped engine statistics.
+        '''
+        return {"book_hits": self.book_hits,
+                "tablebase_hits": self.tablebase_hits,
+                "engine_calls": self.engine_calls,
+                **self._engine.get_stats()}
+
+    def stop_search(self) -> None:
+        '''Stops the running search of the wrapped engine.'''
+        self._engine.stop_search()
+
+    def start_pondering(self, fen_position: str, move: str, moves: Optional[List[str]] = None) -> None:
+        '''Starts pondering of the wrapped engine on the position expected after the move.'''
+        self._engine.start_pondering(fen_position, move, moves)
+
+    def set_remaining_time(self, remaining_time: Optional[float]) -> None:
+        '''Sets the remaining clock of the wrapped engine.'''
+        self._engine.set_remaining_time(remaining_time)
+
+    def close(self) -> None:
+        '''
+        Closes the book, the tablebases and the wrapped engine.
+
+        : return: (None) - this function does not return any value.
+        '''
+        if self._book is not None:
+            self._book.close()
+        if self._tablebase is not None:
+            self._tablebase.close()
+        self._engine.close()
@@ -1,10 +1,15 @@
-import os
+import time
+import chess
 import psutil
 from stockfish import Stockfish
+from typing import List, Optional, Tuple
 
 from chess_engine.chess_engine_base import ChessEngineBase
 from utils.common_utils import find_file_except_extension
-from utils.chess_engine.stockfish_utils import find_nearest_power_of_two
+from utils.chess_engine.stockfish_utils import find_nearest_power_of_two, get_engine_threads, parse_info_line
+from utils.chess_engine.analysis_cache import AnalysisCache
+from utils.chess_engine.game_tracker import make_board
+from utils.chess_engine.time_manager import TimeManager
 
 class ChessEngineStockfish(ChessEngineBase):
     '''Class for chess engine using stockfish engine.'''
@@ -21,28 +26,135 @@ class ChessEngineStockfish(ChessEngineBase):
         program_path = find_file_except_extension(self._config['program_path'], '.txt')
         self._stockfish = Stockfish(program_path)
         if not config["set_default_parameters"]:
-            threads = max(int(os.cpu_count()*config["threads_percent"]), 1)
+            threads = get_engine_threads(config)
             hash = find_nearest_power_of_two(psutil.virtual_memory().total*config["hash_percent"]//(1024*1024))
             self._stockfish.set_depth(config["depth"])
             self._stockfish.set_skill_level(config["engine_level"])
             self._stockfish.update_engine_parameters({"Hash": hash, "Threads": threads})
 
-    def get_best_move(self, fen_position: str) -> str:
+        parameters = self._stockfish.get_parameters()
+        # adaptive search depends on time, so its results are cached regardless of the reached depth
+        depth = "adaptive" if config["search_mode"] == "adaptive" else self._stockfish.depth
+        self._search_parameters = {"depth": depth,
+                                   "skill": parameters["Skill Level"],
+                                   "threads": parameters["Threads"],
+                                   "hash": parameters["Hash"]}
+        self._cache = AnalysisCache(config["analysis_cache"])
+        self._root_fen = None
+        self._remaining_time = None
+
+    def _set_position(self, fen_position: str, moves: List[str]) -> None:
+        '''
+        Sends the position to stockfish as the root position with the moves history.
+        ucinewgame is sent only when the root changes, so the transposition table stays warm during the game.
+
+        : param fen_position: (str) - FEN position the game started from.
+        : param moves: (List[str]) - moves played since fen_position in UCI format.
+
+        : return: (None) - this function does not return any value.
+        '''
+        # the wrapper make_moves_from_current_position checks every move with an extra search
+        # and sends the moves one by one, so the command is written directly
+        self._stockfish._prepare_for_new_position(send_ucinewgame_token=fen_position != self._root_fen)
+        command = f"position fen {fen_position}"
+        if moves:
+            command += " moves " + " ".join(moves)
+        self._stockfish._put(command)
+        self._root_fen = fen_position
+
+    def _adaptive_search(self, board: chess.Board) -> Tuple[Optional[str], dict]:
+        '''
+        Deepens the search of the position set in stockfish one depth at a time, reusing the transposition table,
+        until the best move is stable, the depth limit is reached or the next depth does not fit in the movetime.
+
+        : param board: (chess.Board) - position set in stockfish.
+
+        : return: (Tuple[Optional[str], dict]) - best move and the parsed info line of the last depth.
+        '''
+        time_manager = TimeManager(self._config["time_management"], board, self._remaining_time)
+        start_time = time.perf_counter()
+        first_depth = max(self._config["time_management"]["min_depth"] - self._config["time_management"]["stable_depths"] + 1, 1)
+        for depth in range(first_depth, time_manager.max_depth + 1):
+            depth_start_time = time.perf_counter()
+            self._stockfish.set_depth(depth)
+            best_move = self._stockfish.get_best_move()
+            info = parse_info_line(self._stockfish.info)
+            if best_move is None or time_manager.update(depth, best_move):
+                break
+            # the next depth takes longer than the previous one, so it is not started if it cannot finish in time
+            elapsed = time.perf_counter() - start_time
+            if elapsed + 2 * (time.perf_counter() - depth_start_time) > time_manager.movetime:
+                break
+        return best_move, info
+
+    def set_remaining_time(self, remaining_time: Optional[float]) -> None:
+        '''
+        Sets the remaining clock used by adaptive search mode.
+
+        : param remaining_time: (Optional[float]) - remaining clock in seconds or None if unknown.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self._remaining_time = remaining_time
+
+    def get_analysis(self, fen_position: str, moves: Optional[List[str]] = None) -> dict:
+        '''
+        Analyses the input FEN-position, calling stockfish only if the position is not cached.
+
+        : param fen_position: (str) - input FEN-position to process.
+        : param moves: (Optional[List[str]]) - moves played since fen_position in UCI format.
+
+        : return: (dict) - best move, score in centipawns, mate in moves, principal variation and search time.
+        '''
+        moves = moves or []
+        board = make_board(fen_position, moves)
+        key = AnalysisCache.make_key(board.fen(), self._search_parameters)
+        analysis = self._cache.get(key)
+        if analysis is not None:
+            return analysis
+
+        # checked in process, the wrapper check starts a new stockfish process for every position
+        if not board.is_valid():
+            raise Exception("Stockfish engine cannot recognize best move.")
+
+        start_time = time.perf_counter()
+        self._set_position(fen_position, moves)
+        if self._config["search_mode"] == "adaptive":
+            (best_move, info) = self._adaptive_search(board)
+        else:
+            best_move = self._stockfish.get_best_move()
+            info = parse_info_line(self._stockfish.info)
+        analysis = {"best_move": best_move,
+                    "score": info["score"],
+                    "mate": info["mate"],
+                    "pv": info["pv"],
+                    "search_time": time.perf_counter() - start_time}
+
+        self._cache.put(key, analysis)
+        return analysis
+
+    def get_best_move(self, fen_position: str, moves: Optional[List[str]] = None) -> str:
         '''
         Processes the input FEN-position using stockfish engine.
 
         : param fen_position: (str) - input FEN-position to process.
+        : param moves: (Optional[List[str]]) - moves played since fen_position in UCI format.
 
         : return: (str) - the best move suggestion.
         '''
-        if self._stockfish.is_fen_valid(fen_position):
-            self.position = fen_position
-            self._stockfish.set_fen_position(fen_position)
-            if 'w' in fen_position:
-                print("The best move for white is:", self._stockfish.get_best_move())
-            else:
-                print("The best move for black is:", self._stockfish.get_best_move())
+        self.position = fen_position
+        best_move = self.get_analysis(fen_position, moves)["best_move"]
+        if make_board(fen_position, moves).turn == chess.WHITE:
+            print("The best move for white is:", best_move)
         else:
-            raise Exception("Stockfish engine cannot recognize best move.")
+            print("The best move for black is:", best_move)
 
-        return self._stockfish.get_best_move()
\ No newline at end of file
+        return best_move
+
+    def get_stats(self) -> dict:
+        '''
+        Gets statistics of the analysis cache.
+
+        : return: (dict) - cache hits, misses, hit rate and saved engine time in seconds.
+        '''
+        return self._cache.get_stats()
@@ -0,0 +1,290 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+import chess
+import chess.engine
+import psutil
+from typing import Callable, List, Optional
+
+from chess_engine.chess_engine_base import ChessEngineBase
+from utils.common_utils import find_file_except_extension
+from utils.chess_engine.stockfish_utils import find_nearest_power_of_two, get_engine_threads
+from utils.chess_engine.game_tracker import make_board
+from utils.chess_engine.time_manager import TimeManager
+
+class ChessEngineUCI(ChessEngineBase):
+    '''
+    Class for chess engine driving any UCI engine through asynchronous python-chess client.
+    The event loop runs on its own thread, so searches can be streamed and cancelled from the caller threads.
+    '''
+
+    def __init__(self, config: dict) -> None:
+        '''
+        Initializes an instance of ChessEngineUCI.
+
+        : param config: (dict) - engine configuration object.
+
+        : return: (None) - this function does not return any value.
+        '''
+        super().__init__(config)
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._loop_thread.start()
+
+        program_path = find_file_except_extension(self._config['program_path'], '.txt')
+        self._engine = self._run(self._open_engine(program_path))
+        self._limit = chess.engine.Limit(depth=config["limits"]["depth"],
+                                         time=config["limits"]["movetime"],
+                                         nodes=config["limits"]["nodes"])
+        self._search = None
+        self._analysis = None
+        self._stop_requested = False
+        self._partial_result = None
+        self._last_result = None
+        self._ponder_key = None
+        self._remaining_time = None
+
+        self.num_searches = 0
+        self.num_cancelled = 0
+        self.search_time = 0.0
+        self.num_ponders = 0
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+
+    def _run(self, coroutine) -> object:
+        '''
+        Runs the coroutine on the engine event loop and waits for its result.
+
+        : param coroutine: (Coroutine) - coroutine to run.
+
+        : return: (object) - result of the coroutine.
+        '''
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    async def _open_engine(self, program_path: str) -> chess.engine.UciProtocol:
+        '''
+        Starts the engine process and configures it.
+
+        : param program_path: (str) - path to the engine executable.
+
+        : return: (chess.engine.UciProtocol) - connected engine.
+        '''
+        _, engine = await chess.engine.popen_uci(program_path)
+        if not self._config["set_default_parameters"]:
+            threads = get_engine_threads(self._config)
+            hash = find_nearest_power_of_two(psutil.virtual_memory().total*self._config["hash_percent"]//(1024*1024))
+            await engine.configure({"Threads": threads, "Hash": hash, "Skill Level": self._config["engine_level"]})
+        return engine
+
+    @staticmethod
+    def _info_to_result(info: dict) -> dict:
+        '''
+        Converts python-chess search info to the result format of the engine.
+
+        : param info: (dict) - info received from the engine.
+
+        : return: (dict) - depth, best move, score in centipawns, mate in moves and principal variation.
+        '''
+        pv = [move.uci() for move in info.get("pv", [])]
+        score = info["score"].relative if "score" in info else None
+        return {"depth": info.get("depth"),
+                "best_move": pv[0] if pv else None,
+                "score": score.score() if score is not None else None,
+                "mate": score.mate() if score is not None else None,
+                "pv": pv}
+
+    @staticmethod
+    def _position_key(fen_position: str) -> str:
+        '''
+        Makes key comparing detected and predicted positions: pieces placement and side to move.
+
+        : param fen_position: (str) - FEN position.
+
+        : return: (str) - position key.
+        '''
+        return ' '.join(fen_position.split()[:2])
+
+    async def _analyse(self, board: chess.Board, callback: Optional[Callable[[dict], None]]) -> dict:
+        '''
+        Runs the search, streaming a partial result for every new principal variation.
+        In adaptive search mode the search is stopped as soon as the best move is stable for several depths.
+
+        : param board: (chess.Board) - position to analyse.
+        : param callback: (Optional[Callable]) - called with every partial result.
+
+        : return: (dict) - final result of the search.
+        '''
+        start_time = time.perf_counter()
+        result = {"depth": None, "best_move": None, "score": None, "mate": None, "pv": []}
+        (limit, time_manager) = (self._limit, None)
+        if self._config["search_mode"] == "adaptive":
+            time_manager = TimeManager(self._config["time_management"], board, self._remaining_time)
+            limit = chess.engine.Limit(time=time_manager.movetime, depth=time_manager.max_depth)
+
+        with await self._engine.analysis(board, limit) as analysis:
+            self._analysis = analysis
+            if self._stop_requested:
+                analysis.stop()
+            async for info in analysis:
+                if "pv" not in info:
+                    continue
+                result = self._info_to_result(info)
+                self._partial_result = result
+                if callback is not None:
+                    callback(result)
+                if (time_manager is not None and result["depth"] is not None
+                        and time_manager.update(result["depth"], result["best_move"])):
+                    analysis.stop()
+                    time_manager = None
+            best_move = await analysis.wait()
+
+        self.search_time += time.perf_counter() - start_time
+        result["best_move"] = best_move.move.uci() if best_move.move is not None else None
+        result["ponder"] = best_move.ponder.uci() if best_move.ponder is not None else None
+        return result
+
+    def start_search(self,
+                     fen_position: str,
+                     callback: Optional[Callable[[dict], None]] = None,
+                     moves: Optional[List[str]] = None) -> concurrent.futures.Future:
+        '''
+        Starts the search of the position, stopping the previous one.
+        The engine gets the position with the moves history, so its transposition table is reused during the game.
+
+        : param fen_position: (str) - input FEN-position to process.
+        : param callback: (Optional[Callable]) - called from the engine thread with every partial result.
+        : param moves: (Optional[List[str]]) - moves played since fen_position in UCI format.
+
+        : return: (concurrent.futures.Future) - future with the final result.
+        '''
+        board = make_board(fen_position, moves)
+        if not board.is_valid():
+            raise Exception("UCI engine cannot analyse invalid position.")
+
+        # the ponder search becomes the real one if the opponent played the expected reply
+        if self._ponder_key is not None:
+            ponder_key, self._ponder_key = self._ponder_key, None
+            if self._position_key(board.fen()) == ponder_key:
+                self.ponder_hits += 1
+                return self._search
+            self.ponder_misses += 1
+
+        self.stop_search()
+        self._analysis = None
+        self._stop_requested = False
+        self._partial_result = None
+        self.num_searches += 1
+        self._search = asyncio.run_coroutine_threadsafe(self._analyse(board, callback), self._loop)
+        return self._search
+
+    def get_partial_result(self) -> Optional[dict]:
+        '''
+        Gets the latest partial result of the running or finished search.
+
+        : return: (Optional[dict]) - depth, best move, score, mate and principal variation.
+        '''
+        return self._partial_result
+
+    def stop_search(self) -> None:
+        '''
+        Stops the running search. The engine answers with the best move found so far.
+
+        : return: (None) - this function does not return any value.
+        '''
+        # the ponder search is resolved by the next start_search, when the real position is known
+        if self._search is None or self._search.done() or self._ponder_key is not None:
+            return
+        self.num_cancelled += 1
+        self._stop_requested = True
+        if self._analysis is not None:
+            self._loop.call_soon_threadsafe(self._analysis.stop)
+        try:
+            self._search.result()
+        except Exception:
+            pass
+
+    def get_best_move(self, fen_position: str, moves: Optional[List[str]] = None) -> str:
+        '''
+        Processes the input FEN-position using UCI engine.
+
+        : param fen_position: (str) - input FEN-position to process.
+        : param moves: (Optional[List[str]]) - moves played since fen_position in UCI format.
+
+        : return: (str) - the best move suggestion.
+        '''
+        board = make_board(fen_position, moves)
+        result = self.start_search(fen_position, moves=moves).result()
+        self._last_result = (board.fen(), result)
+        best_move = result["best_move"]
+        if board.turn == chess.WHITE:
+            print("The best move for white is:", best_move)
+        else:
+            print("The best move for black is:", best_move)
+
+        return best_move
+
+    def start_pondering(self, fen_position: str, move: str, moves: Optional[List[str]] = None) -> None:
+        '''
+        Starts the search of the position expected after the move and the opponent reply predicted by the last search.
+
+        : param fen_position: (str) - FEN position the move was played in.
+        : param move: (str) - played move in UCI format.
+        : param moves: (Optional[List[str]]) - moves played since fen_position before the move in UCI format.
+
+        : return: (None) - this function does not return any value.
+        '''
+        board = make_board(fen_position, moves)
+        if not self._config["ponder"] or self._last_result is None or self._last_result[0] != board.fen():
+            return
+        result = self._last_result[1]
+        reply = result["ponder"] or (result["pv"][1] if len(result["pv"]) > 1 and result["pv"][0] == move else None)
+        if reply is None:
+            return
+
+        try:
+            board.push_uci(move)
+            board.push_uci(reply)
+        except ValueError:
+            return
+        if not board.is_valid():
+            return
+
+        self.stop_search()
+        self._analysis = None
+        self._stop_requested = False
+        self._partial_result = None
+        self._ponder_key = self._position_key(board.fen())
+        self.num_ponders += 1
+        self._search = asyncio.run_coroutine_threadsafe(self._analyse(board, None), self._loop)
+
+    def set_remaining_time(self, remaining_time: Optional[float]) -> None:
+        '''
+        Sets the remaining clock used by adaptive search mode.
+
+        : param remaining_time: (Optional[float]) - remaining clock in seconds or None if unknown.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self._remaining_time = remaining_time
+
+    def get_stats(self) -> dict:
+        '''
+        Gets search statistics.
+
+        : return: (dict) - number of searches, number of cancelled ones, total search time in seconds
+        and pondering hits and misses.
+        '''
+        return {"searches": self.num_searches, "cancelled": self.num_cancelled, "search_time": self.search_time,
+                "ponders": self.num_ponders, "ponder_hits": self.ponder_hits, "ponder_misses": self.ponder_misses}
+
+    def close(self) -> None:
+        '''
+        Stops the search and quits the engine process.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self._ponder_key = None
+        self.stop_search()
+        self._run(self._engine.quit())
+        self._loop.call_soon_threadsafe(self._loop.stop)
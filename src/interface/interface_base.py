@@ -4,6 +4,7 @@ class InterfaceBase(ABC):
     '''Base class for program interface.'''
     def __init__(self, config: dict) -> None:
         self._config = config
+        self._components_statuses = {}
 
     @abstractmethod
     def run(self) -> None:
@@ -23,4 +24,8 @@ class InterfaceBase(ABC):
     
     @abstractmethod
     def is_running(self) -> bool:
-        '''Gets program state from user.'''
\ No newline at end of file
+        '''Gets program state from user.'''
+
+    def set_components_statuses(self, statuses: dict) -> None:
+        '''Sets loading statuses of program components shown to user.'''
+        self._components_statuses = statuses
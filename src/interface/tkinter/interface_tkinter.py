@@ -92,6 +92,21 @@ class InterfaceTkinter(InterfaceBase):
         switch_button = tk.Button(switch_frame, textvariable=switch_var, command=toggle_pause_run, width=10)
         switch_button.pack()
 
+        # Show readiness of the components loaded in background
+        status_frame = tk.Frame(window)
+        status_frame.pack(side=tk.BOTTOM, pady=5)
+
+        status_var = tk.StringVar()
+        status_label = tk.Label(status_frame, textvariable=status_var, justify=tk.LEFT)
+        status_label.pack(anchor=tk.W)
+
+        def update_statuses():
+            lines = [f"{name}: {status}" for name, status in self._components_statuses.items()]
+            status_var.set('\n'.join([LabelValue.COMPONENTS_STATUS.value] + lines))
+            window.after(self._config["status_update_ms"], update_statuses)
+
+        update_statuses()
+
         window.protocol("WM_DELETE_WINDOW", on_close)
         window.mainloop()
     
@@ -1,17 +1,30 @@
 from pieces_detection.pieces_detection_base import PiecesDetectionBase
-from pieces_detection.mmdetection.pieces_detection_mmdetection import PiecesDetectionMMDetection
 from utils.pieces_detection.detection_utils import DetectionType
+from typing import Optional
 from utils.common_utils import load_config
 
-def create_detection_engine(config: dict) -> PiecesDetectionBase:
+def create_detection_engine(config: dict, threads: Optional[int] = None) -> PiecesDetectionBase:
     '''
     Creates an instance of the pieces detection engine based on config.
-    
+    Engines are imported lazily, so e.g. the ONNX engine does not import torch and mmdet.
+
     : param config: (dict) - main config file.
-    
+    : param threads: (Optional[int]) - number of inference threads planned by the CPU budget for engines having own thread pools.
+
     : return: (PiecesDetectionBase) - instance of the pieces detection engine.
     '''
     model_config = load_config(f'../assets/configs/pieces_detection/{config["pieces_detection"]["detection_type"]}/config.json')
+    if threads and "num_threads" in model_config:
+        model_config["num_threads"] = threads
 
     if config["pieces_detection"]["detection_type"] == DetectionType.MMDETECTION:
-        return PiecesDetectionMMDetection(model_config)
\ No newline at end of file
+        from pieces_detection.mmdetection.pieces_detection_mmdetection import PiecesDetectionMMDetection
+        return PiecesDetectionMMDetection(model_config)
+
+    if config["pieces_detection"]["detection_type"] == DetectionType.SQUARE_CLASSIFIER:
+        from pieces_detection.square_classifier.pieces_detection_square_classifier import PiecesDetectionSquareClassifier
+        return PiecesDetectionSquareClassifier(model_config)
+
+    if config["pieces_detection"]["detection_type"] == DetectionType.ONNX:
+        from pieces_detection.onnx.pieces_detection_onnx import PiecesDetectionONNX
+        return PiecesDetectionONNX(model_config)
\ No newline at end of file
@@ -1,13 +1,14 @@
 import numpy
 import torch
 import glob
+import time
 from mmdet.apis import DetInferencer
-from typing import Tuple
+from typing import List, Tuple
 
 from utils.common_utils import load_config
 from utils.pieces_detection.detection_utils import filter_detections
 from pieces_detection.pieces_detection_base import PiecesDetectionBase
-from utils.pieces_detection.chess_board import ChessBoard
+from utils.pieces_detection.chess_board import ChessBoard, detections_to_positions
 
 class PiecesDetectionMMDetection(PiecesDetectionBase):
     '''Class for pieces detection using MMDetection model.'''
@@ -15,31 +16,95 @@ class PiecesDetectionMMDetection(PiecesDetectionBase):
     def __init__(self, config: dict) -> None:
         '''
         Initializes an instance of PiecesDetectionMMDetection.
+        The model is loaded and warmed up once here and then reused for every frame.
 
         : param config: (dict) - model configuration object.
-        
+
         : return: (None) - this function does not return any value.
         '''
         super().__init__(config)
         self._board_config = load_config(config["chess_board_config"])
+        self._board_label = [int(index) for index, name in self._board_config["pieces_indexes"].items()
+                             if name == self._board_config["board_constant"]][0]
+        self._inferencer = None
+        self.load_time = 0.0
+        self.warm_up_time = 0.0
+        self.inference_time = 0.0
+        self._num_inferences = 0
+        self._total_inference_time = 0.0
+        self.reload()
 
-    def detect(self, image: numpy.ndarray, color: str) -> Tuple[str, ChessBoard]:
+    def reload(self) -> None:
         '''
-        Detects chess pieces on the given image.
-        
-        : param image: (numpy.ndarray) - image to make detections on it.
-        : color: (str) - color which user plays.
+        (Re)loads the model weights and runs a warm-up pass.
+        Can be called at any time, e.g. after the checkpoint file was replaced.
 
-        : return: (Tuple[str, ChessBoard]) - FEN-position from the given image and filled ChessBoard.
+        : return: (None) - this function does not return any value.
         '''
+        start_time = time.perf_counter()
         model_script = self._config['parameters_path']
         model_checkpoint = glob.glob(self._config['checkpoint_path'])[0]
         device = 'cuda:0' if torch.cuda.is_available() else 'cpu'
 
-        inferencer = DetInferencer(model_script, model_checkpoint, device)
-        result = filter_detections(inferencer(image), self._config['iou_threshold'], self._config['score_threshold'])
-        
-        chess_board = ChessBoard(self._board_config, result['predictions'][0]['labels'], result['predictions'][0]['bboxes'], color)
-        fen_position = chess_board.detections_to_fen()
+        self._inferencer = DetInferencer(model_script, model_checkpoint, device)
+        self.load_time = time.perf_counter() - start_time
+
+        self._num_inferences = 0
+        self._total_inference_time = 0.0
+        self._warm_up()
+        print(f"Detection model loaded in {self.load_time:.2f} s, warm-up took {self.warm_up_time:.2f} s.")
+
+    def _warm_up(self) -> None:
+        '''
+        Runs the model on a blank image so that lazy initialization
+        (memory allocation, kernel selection) does not fall on the first real frame.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self.warm_up_time = 0.0
+        if not self._config.get("warm_up", True):
+            return
+
+        start_time = time.perf_counter()
+        height, width = self._config.get("warm_up_image_size", [640, 640])
+        self._inferencer(numpy.zeros((height, width, 3), dtype=numpy.uint8))
+        self.warm_up_time = time.perf_counter() - start_time
+
+    def get_timings(self) -> dict:
+        '''
+        Gets timing statistics of the model.
+
+        : return: (dict) - load time, warm-up time, last and mean inference time in seconds.
+        '''
+        mean_inference_time = self._total_inference_time / self._num_inferences if self._num_inferences else 0.0
+        return {
+            "load_time": self.load_time,
+            "warm_up_time": self.warm_up_time,
+            "last_inference_time": self.inference_time,
+            "mean_inference_time": mean_inference_time,
+            "num_inferences": self._num_inferences,
+        }
+
+    def detect(self, image: numpy.ndarray, color: str) -> List[Tuple[str, ChessBoard]]:
+        '''
+        Detects chess pieces on all chess boards on the given image.
+
+        : param image: (numpy.ndarray) - image to make detections on it.
+        : color: (str) - color which user plays.
+
+        : return: (List[Tuple[str, ChessBoard]]) - FEN-positions and filled ChessBoards for every board on the image.
+        '''
+        start_time = time.perf_counter()
+        raw_result = self._inferencer(image)
+        self.inference_time = time.perf_counter() - start_time
+        self._total_inference_time += self.inference_time
+        self._num_inferences += 1
+
+        result = filter_detections(raw_result,
+                                   self._config['iou_threshold'],
+                                   self._config['score_threshold'],
+                                   self._config.get('class_agnostic_nms', True),
+                                   self._board_label)
 
-        return (fen_position, chess_board)
\ No newline at end of file
+        predictions = result['predictions'][0]
+        return detections_to_positions(self._board_config, predictions['labels'], predictions['bboxes'], color, predictions['scores'])
@@ -0,0 +1,154 @@
+import cv2
+import numpy
+import time
+import onnxruntime
+from typing import List, Tuple
+
+from utils.common_utils import load_config
+from utils.pieces_detection.detection_utils import filter_detections, non_max_suppression
+from pieces_detection.pieces_detection_base import PiecesDetectionBase
+from utils.pieces_detection.chess_board import ChessBoard, detections_to_positions
+
+def preprocess_image(image: numpy.ndarray, config: dict) -> Tuple[numpy.ndarray, float]:
+    '''
+    Resizes the image keeping its ratio, pads it to a square and normalizes it like mmdet data preprocessor.
+
+    : param image: (numpy.ndarray) - BGR image.
+    : param config: (dict) - ONNX model configuration object.
+
+    : return: (Tuple[numpy.ndarray, float]) - model input with shape (1, 3, input_size, input_size) and resize scale.
+    '''
+    input_size = config["input_size"]
+    height, width = image.shape[:2]
+    scale = min(input_size / height, input_size / width)
+    resized_height, resized_width = int(round(height * scale)), int(round(width * scale))
+    resized = cv2.resize(image, (resized_width, resized_height), interpolation=cv2.INTER_LINEAR)
+
+    padded = numpy.full((input_size, input_size, 3), config["pad_value"], dtype=numpy.float32)
+    padded[:resized_height, :resized_width] = resized
+    padded = (padded - numpy.array(config["mean"], dtype=numpy.float32)) / numpy.array(config["std"], dtype=numpy.float32)
+
+    return padded.transpose(2, 0, 1)[None], scale
+
+class PiecesDetectionONNX(PiecesDetectionBase):
+    '''
+    Class for pieces detection using RTMDet model exported to ONNX.
+    Pre- and post-processing are done in NumPy, so neither torch nor mmdet is needed.
+    '''
+
+    def __init__(self, config: dict) -> None:
+        '''
+        Initializes an instance of PiecesDetectionONNX.
+
+        : param config: (dict) - model configuration object.
+
+        : return: (None) - this function does not return any value.
+        '''
+        super().__init__(config)
+        self._board_config = load_config(config["chess_board_config"])
+        self._board_label = [int(index) for index, name in self._board_config["pieces_indexes"].items()
+                             if name == self._board_config["board_constant"]][0]
+        self._input_size = config["input_size"]
+        self._priors = self._make_priors(self._input_size, config["strides"])
+        self._session = None
+        self.load_time = 0.0
+        self.inference_time = 0.0
+        self.reload()
+
+    def reload(self) -> None:
+        '''
+        (Re)creates the ONNX Runtime session and runs a warm-up pass.
+        The float or the INT8 quantized model is loaded according to config precision.
+
+        : return: (None) - this function does not return any value.
+        '''
+        start_time = time.perf_counter()
+        model_path = self._config["int8_model_path"] if self._config["precision"] == "int8" else self._config["model_path"]
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = self._config["num_threads"]
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = onnxruntime.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self._input_name = self._session.get_inputs()[0].name
+
+        if self._config.get("warm_up", True):
+            self._session.run(None, {self._input_name: numpy.zeros((1, 3, self._input_size, self._input_size), dtype=numpy.float32)})
+        self.load_time = time.perf_counter() - start_time
+        print(f"ONNX detection model ({self._config['precision']}) loaded in {self.load_time:.2f} s.")
+
+    @staticmethod
+    def _make_priors(input_size: int, strides: List[int]) -> numpy.ndarray:
+        '''
+        Generates anchor points of all feature levels in the order of the exported model outputs.
+
+        : param input_size: (int) - side of the square model input.
+        : param strides: (List[int]) - strides of feature levels.
+
+        : return: (numpy.ndarray) - points with shape (N, 2) in [x, y] format.
+        '''
+        priors = []
+        for stride in strides:
+            size = input_size // stride
+            ys, xs = numpy.meshgrid(numpy.arange(size), numpy.arange(size), indexing='ij')
+            priors.append(numpy.stack([xs.reshape(-1), ys.reshape(-1)], axis=1) * stride)
+        return numpy.concatenate(priors).astype(numpy.float32)
+
+    def _postprocess(self, scores: numpy.ndarray, distances: numpy.ndarray, scale: float) -> dict:
+        '''
+        Decodes raw model outputs into boxes in the coordinates of the original image.
+
+        : param scores: (numpy.ndarray) - class probabilities with shape (N, num_classes).
+        : param distances: (numpy.ndarray) - distances from priors to box sides with shape (N, 4).
+        : param scale: (float) - resize scale used in preprocessing.
+
+        : return: (dict) - predictions in DetInferencer format.
+        '''
+        labels = scores.argmax(axis=1)
+        best_scores = scores[numpy.arange(len(scores)), labels]
+
+        candidates = numpy.flatnonzero(best_scores >= self._config["model_score_threshold"])
+        candidates = candidates[numpy.argsort(-best_scores[candidates])[:self._config["nms_pre"]]]
+
+        priors = self._priors[candidates]
+        bboxes = numpy.concatenate([priors - distances[candidates, :2], priors + distances[candidates, 2:]], axis=1) / scale
+        labels, best_scores = labels[candidates], best_scores[candidates]
+
+        # per-class NMS the model itself is trained with
+        keep = non_max_suppression(bboxes, best_scores, labels, self._config["model_iou_threshold"],
+                                   self._config["model_score_threshold"], class_agnostic=False)
+        keep = keep[numpy.argsort(-best_scores[keep])[:self._config["max_per_img"]]]
+
+        return {'predictions': [{'labels': labels[keep], 'scores': best_scores[keep], 'bboxes': bboxes[keep]}],
+                'visualization': []}
+
+    def predict(self, image: numpy.ndarray) -> dict:
+        '''
+        Runs the model on the given image and filters its predictions.
+
+        : param image: (numpy.ndarray) - image to make detections on it.
+
+        : return: (dict) - filtered predictions in DetInferencer format.
+        '''
+        start_time = time.perf_counter()
+        model_input, scale = preprocess_image(image, self._config)
+        scores, distances = self._session.run(None, {self._input_name: model_input})
+        raw_result = self._postprocess(scores[0], distances[0], scale)
+        self.inference_time = time.perf_counter() - start_time
+
+        return filter_detections(raw_result,
+                                 self._config['iou_threshold'],
+                                 self._config['score_threshold'],
+                                 self._config['class_agnostic_nms'],
+                                 self._board_label)
+
+    def detect(self, image: numpy.ndarray, color: str) -> List[Tuple[str, ChessBoard]]:
+        '''
+        Detects chess pieces on all chess boards on the given image.
+
+        : param image: (numpy.ndarray) - image to make detections on it.
+        : color: (str) - color which user plays.
+
+        : return: (List[Tuple[str, ChessBoard]]) - FEN-positions and filled ChessBoards for every board on the image.
+        '''
+        result = self.predict(image)
+        predictions = result['predictions'][0]
+        return detections_to_positions(self._board_config, predictions['labels'], predictions['bboxes'], color, predictions['scores'])
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 import numpy
-from typing import Tuple
+from typing import List, Tuple
 from utils.pieces_detection.chess_board import ChessBoard
 
 class PiecesDetectionBase(ABC):
@@ -9,5 +9,5 @@ class PiecesDetectionBase(ABC):
         self._config = config
 
     @abstractmethod
-    def detect(self, image: numpy.ndarray) -> Tuple[str, ChessBoard]:
-        '''Detects chess_pieces on given image.'''
\ No newline at end of file
+    def detect(self, image: numpy.ndarray, color: str) -> List[Tuple[str, ChessBoard]]:
+        '''Detects chess_pieces on all chess boards on given image.'''
\ No newline at end of file
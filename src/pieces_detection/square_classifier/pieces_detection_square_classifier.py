@@ -0,0 +1,205 @@
+import cv2
+import numpy
+from typing import List, Optional, Tuple
+
+from utils.common_utils import load_config
+from utils.interface_utils import ButtonValue
+from utils.pieces_detection.chess_board import ChessBoard, fen_to_board
+from pieces_detection.pieces_detection_base import PiecesDetectionBase
+from pieces_detection.mmdetection.pieces_detection_mmdetection import PiecesDetectionMMDetection
+
+EMPTY_SQUARE = '.'
+
+class PiecesDetectionSquareClassifier(PiecesDetectionBase):
+    '''
+    Class for pieces detection by classifying 64 board squares with templates.
+    Templates are cached from detections of the MMDetection model, which is also
+    used as a fallback when the classification is uncertain.
+    '''
+
+    def __init__(self, config: dict) -> None:
+        '''
+        Initializes an instance of PiecesDetectionSquareClassifier.
+
+        : param config: (dict) - model configuration object.
+
+        : return: (None) - this function does not return any value.
+        '''
+        super().__init__(config)
+        self._board_config = load_config(config["chess_board_config"])
+        self._tile_size = config["tile_size"]
+        self._max_templates_per_class = config["max_templates_per_class"]
+        self._min_confidence = config["min_confidence"]
+        self._min_margin = config["min_margin"]
+        self._max_board_shift = config["max_board_shift"]
+        self._fallback_model = PiecesDetectionMMDetection(load_config(config["fallback_config"]))
+
+        pieces_indexes = {int(index): name for index, name in self._board_config["pieces_indexes"].items()}
+        self._board_label = [index for index, name in pieces_indexes.items() if name == self._board_config["board_constant"]][0]
+        self._letter_to_label = {self._board_config["pieces_names"][name]: index for index, name in pieces_indexes.items()
+                                 if name in self._board_config["pieces_names"]}
+
+        self.num_classified = 0
+        self.num_fallbacks = 0
+        self._reset_templates()
+
+    def _reset_templates(self) -> None:
+        '''
+        Forgets cached templates and the board location.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self._templates = numpy.zeros((0, self._tile_size * self._tile_size * 3), dtype=numpy.float32)
+        self._template_classes = numpy.zeros(0, dtype='<U1')
+        self._boards_bboxes = None
+        self._image_shape = None
+
+    def reload(self) -> None:
+        '''
+        Reloads the fallback model and forgets cached templates.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self._fallback_model.reload()
+        self._reset_templates()
+
+    def get_stats(self) -> dict:
+        '''
+        Gets statistics of the classifier.
+
+        : return: (dict) - number of frames classified by templates, number of fallbacks and fallback rate.
+        '''
+        total = self.num_classified + self.num_fallbacks
+        return {
+            "classified": self.num_classified,
+            "fallbacks": self.num_fallbacks,
+            "fallback_rate": self.num_fallbacks / total if total else 0.0,
+        }
+
+    def detect(self, image: numpy.ndarray, color: str) -> List[Tuple[str, ChessBoard]]:
+        '''
+        Detects chess pieces on all chess boards on the given image.
+
+        : param image: (numpy.ndarray) - image to make detections on it.
+        : color: (str) - color which user plays.
+
+        : return: (List[Tuple[str, ChessBoard]]) - FEN-positions and filled ChessBoards for every board on the image.
+        '''
+        if self._boards_bboxes is not None and image.shape == self._image_shape:
+            boards_classes = self._classify_squares(image)
+            if boards_classes is not None:
+                self.num_classified += 1
+                positions = []
+                for classes, board_bbox in zip(boards_classes, self._boards_bboxes):
+                    chess_board = self._make_chess_board(classes, board_bbox, color)
+                    positions.append((chess_board.detections_to_fen(), chess_board))
+                return positions
+
+        self.num_fallbacks += 1
+        positions = self._fallback_model.detect(image, color)
+        self._update_templates(image, positions, color)
+        return positions
+
+    def _cut_tiles(self, image: numpy.ndarray, board_bbox: numpy.ndarray) -> numpy.ndarray:
+        '''
+        Warps the board to a square of 8x8 tiles and cuts it into flattened tiles.
+
+        : param image: (numpy.ndarray) - BGR image.
+        : param board_bbox: (numpy.ndarray) - board bbox in [x_min, y_min, x_max, y_max] format.
+
+        : return: (numpy.ndarray) - tiles with shape (64, tile_size*tile_size*3) in image order, values in [0, 1].
+        '''
+        x_min, y_min, x_max, y_max = [int(value) for value in board_bbox]
+        side = 8 * self._tile_size
+        board = cv2.resize(image[max(y_min, 0):y_max, max(x_min, 0):x_max], (side, side), interpolation=cv2.INTER_AREA)
+        tiles = board.reshape(8, self._tile_size, 8, self._tile_size, 3).transpose(0, 2, 1, 3, 4)
+        return tiles.reshape(64, -1).astype(numpy.float32) / 255
+
+    def _classify_squares(self, image: numpy.ndarray) -> Optional[numpy.ndarray]:
+        '''
+        Classifies all squares of all boards in one batched nearest-template pass.
+
+        : param image: (numpy.ndarray) - BGR image.
+
+        : return: (Optional[numpy.ndarray]) - pieces letters or EMPTY_SQUARE with shape (num_boards, 8, 8)
+        in image order, None if any square is uncertain.
+        '''
+        tiles = numpy.concatenate([self._cut_tiles(image, board_bbox) for board_bbox in self._boards_bboxes])
+
+        # squared euclidean distances between every tile and every template
+        distances = ((tiles**2).sum(axis=1)[:, None] + (self._templates**2).sum(axis=1)[None, :]
+                     - 2 * tiles @ self._templates.T)
+        similarity = 1 - numpy.sqrt(numpy.clip(distances, 0, None) / tiles.shape[1])
+
+        best = similarity.argmax(axis=1)
+        best_similarity = similarity[numpy.arange(len(tiles)), best]
+        best_classes = self._template_classes[best]
+
+        other_class_similarity = numpy.where(self._template_classes[None, :] != best_classes[:, None], similarity, -numpy.inf)
+        margin = best_similarity - other_class_similarity.max(axis=1)
+
+        if best_similarity.min() < self._min_confidence or margin.min() < self._min_margin:
+            return None
+
+        return best_classes.reshape(-1, 8, 8)
+
+    def _update_templates(self, image: numpy.ndarray, positions: List[Tuple[str, ChessBoard]], color: str) -> None:
+        '''
+        Caches tiles of a frame detected by the fallback model as templates.
+
+        : param image: (numpy.ndarray) - BGR image.
+        : param positions: (List[Tuple[str, ChessBoard]]) - detected FEN-positions and boards.
+        : color: (str) - color which user plays.
+
+        : return: (None) - this function does not return any value.
+        '''
+        boards_bboxes = numpy.array([chess_board.get_board_bbox() for _, chess_board in positions], dtype=numpy.float32)
+        squares_sizes = numpy.minimum(boards_bboxes[:, 2] - boards_bboxes[:, 0], boards_bboxes[:, 3] - boards_bboxes[:, 1]) / 8
+        if (self._boards_bboxes is None or image.shape != self._image_shape
+                or self._boards_bboxes.shape != boards_bboxes.shape
+                or (numpy.abs(boards_bboxes - self._boards_bboxes) > squares_sizes[:, None] * self._max_board_shift).any()):
+            # the boards moved, so templates of the old location are not comparable anymore
+            self._reset_templates()
+            self._boards_bboxes = boards_bboxes
+            self._image_shape = image.shape
+
+        boards_classes = []
+        for fen_position, _ in positions:
+            chess_board = fen_to_board(fen_position)
+            if color == ButtonValue.BLACK:
+                chess_board = numpy.rot90(chess_board, 2)
+            boards_classes.append(numpy.where(chess_board == None, EMPTY_SQUARE, chess_board).reshape(64).astype('<U1'))
+
+        tiles = [self._cut_tiles(image, board_bbox) for board_bbox in self._boards_bboxes]
+        templates = numpy.concatenate([self._templates] + tiles)
+        template_classes = numpy.concatenate([self._template_classes] + boards_classes)
+
+        # keep only the most recent templates of every class
+        keep = numpy.zeros(len(template_classes), dtype=numpy.bool_)
+        for square_class in numpy.unique(template_classes):
+            keep[numpy.flatnonzero(template_classes == square_class)[-self._max_templates_per_class:]] = True
+        self._templates = templates[keep]
+        self._template_classes = template_classes[keep]
+
+    def _make_chess_board(self, classes: numpy.ndarray, board_bbox: numpy.ndarray, color: str) -> ChessBoard:
+        '''
+        Builds ChessBoard from classified squares, so it can be used like a detection result.
+
+        : param classes: (numpy.ndarray) - pieces letters or EMPTY_SQUARE with shape (8, 8) in image order.
+        : param board_bbox: (numpy.ndarray) - board bbox in [x_min, y_min, x_max, y_max] format.
+        : color: (str) - color which user plays.
+
+        : return: (ChessBoard) - chess board with one bbox for every piece.
+        '''
+        x_min, y_min, x_max, y_max = board_bbox
+        square_width, square_height = (x_max - x_min) / 8, (y_max - y_min) / 8
+
+        ys, xs = numpy.nonzero(classes != EMPTY_SQUARE)
+        pieces_bboxes = numpy.stack([x_min + xs * square_width,
+                                     y_min + ys * square_height,
+                                     x_min + (xs + 1) * square_width,
+                                     y_min + (ys + 1) * square_height], axis=1)
+        labels = numpy.array([self._board_label] + [self._letter_to_label[letter] for letter in classes[ys, xs]])
+        bboxes = numpy.concatenate([numpy.array([board_bbox], dtype=numpy.float32), pieces_bboxes])
+
+        return ChessBoard(self._board_config, labels, bboxes, color)
@@ -1,11 +1,10 @@
 from speech_recognizer.speech_recognizer_base import SpeechRecognizerBase
-from speech_recognizer.speech_recognition_lib.speech_recognition import SpeechRecognizerLib
-from speech_recognizer.whisper_tiny.asr_whisper_tiny import SpeechRecognizerWhisper
 from utils.common_utils import load_config
 
 def create_speech_recognition_engine(config: dict) -> SpeechRecognizerBase:
     '''
     Creates an instance of the speech recognition engine based on config.
+    Engines are imported lazily, so torch and transformers are imported only when the engine is created.
     
     : param config: (dict) - main config file.
     
@@ -13,9 +12,21 @@ def create_speech_recognition_engine(config: dict) -> SpeechRecognizerBase:
     '''
 
     if config["speech_recognition"]["recognition_type"] == "speech_recognition":
+        from speech_recognizer.speech_recognition_lib.speech_recognition import SpeechRecognizerLib
         recognition_config = load_config('../assets/configs/speech_recognition/speech_recognition/config.json')
         return SpeechRecognizerLib(recognition_config)
     
     if config["speech_recognition"]["recognition_type"] == "whisper_tiny":
+        from speech_recognizer.whisper_tiny.asr_whisper_tiny import SpeechRecognizerWhisper
         recognition_config = load_config('../assets/configs/speech_recognition/whisper_tiny/config.json')
-        return SpeechRecognizerWhisper(recognition_config)
\ No newline at end of file
+        return SpeechRecognizerWhisper(recognition_config)
+    
+    if config["speech_recognition"]["recognition_type"] == "whisper_tiny_int8":
+        from speech_recognizer.whisper_tiny_int8.asr_whisper_tiny_int8 import SpeechRecognizerWhisperInt8
+        recognition_config = load_config('../assets/configs/speech_recognition/whisper_tiny_int8/config.json')
+        return SpeechRecognizerWhisperInt8(recognition_config)
+    
+    if config["speech_recognition"]["recognition_type"] == "keyword_spotting":
+        from speech_recognizer.keyword_spotting.asr_keyword_spotting import SpeechRecognizerKeywordSpotting
+        recognition_config = load_config('../assets/configs/speech_recognition/keyword_spotting/config.json')
+        return SpeechRecognizerKeywordSpotting(recognition_config)
\ No newline at end of file
@@ -0,0 +1,237 @@
+import itertools
+import os
+import time
+import numpy as np
+import torch
+import torchaudio
+from typing import Any, List, Optional, Tuple
+
+from utils.common_utils import load_config
+from utils.move_grammar import rescore_hypotheses
+from utils.speech_recognition_utils import AudioStream, VoiceActivityDetector
+from speech_recognizer.speech_recognizer_base import SpeechRecognizerBase
+
+# closed vocabulary of the spoken commands and the characters they add to the normalized move
+WORDS = {"a": "a", "b": "b", "c": "c", "d": "d", "e": "e", "f": "f", "g": "g", "h": "h",
+         "one": "1", "two": "2", "three": "3", "four": "4", "five": "5", "six": "6", "seven": "7", "eight": "8",
+         "king": "k", "queen": "q", "rook": "r", "bishop": "b", "knight": "n", "pawn": "",
+         "takes": "x", "promote": "", "castle": "oo"}
+
+
+def compute_log_mel(samples: np.ndarray, mel_transform: torchaudio.transforms.MelSpectrogram) -> np.ndarray:
+    '''
+    Computes log-mel frames of the samples.
+
+    : param samples: (np.ndarray) - mono float32 samples at the feature sample rate.
+    : param mel_transform: (torchaudio.transforms.MelSpectrogram) - mel spectrogram transform.
+
+    : return: (np.ndarray) - log-mel frames with shape (n_mels, num_frames).
+    '''
+    with torch.no_grad():
+        return torch.log(mel_transform(torch.from_numpy(samples)) + 1e-6).numpy()
+
+
+def split_words(log_mel: np.ndarray, config: dict) -> List[Tuple[int, int]]:
+    '''
+    Splits the utterance into words by the pauses between them.
+
+    : param log_mel: (np.ndarray) - log-mel frames with shape (n_mels, num_frames).
+    : param config: (dict) - keyword spotting configuration object.
+
+    : return: (List[Tuple[int, int]]) - first and after the last frame of every word.
+    '''
+    frame_ms = config["hop_length"] / config["sample_rate"] * 1000
+    power = np.exp(log_mel).sum(axis=0)
+    voiced = power > power.max() * config["silence_ratio"]
+
+    words = []
+    for is_voiced, frames in itertools.groupby(range(len(voiced)), key=lambda frame: voiced[frame]):
+        frames = list(frames)
+        if not is_voiced:
+            continue
+        # short pauses inside a word, e.g. before a plosive, do not split it
+        if words and (frames[0] - words[-1][1]) * frame_ms < config["min_gap_ms"]:
+            words[-1] = (words[-1][0], frames[-1] + 1)
+        else:
+            words.append((frames[0], frames[-1] + 1))
+    return [(start, end) for start, end in words if (end - start) * frame_ms >= config["min_word_ms"]]
+
+
+def word_features(log_mel: np.ndarray, word_frames: int) -> np.ndarray:
+    '''
+    Stretches the word frames to the fixed length and normalizes them, so a dot product is the cosine similarity.
+
+    : param log_mel: (np.ndarray) - log-mel frames of the word with shape (n_mels, num_frames).
+    : param word_frames: (int) - number of frames after stretching.
+
+    : return: (np.ndarray) - unit feature vector with n_mels*word_frames values.
+    '''
+    positions = np.linspace(0, log_mel.shape[1] - 1, word_frames)
+    stretched = np.stack([np.interp(positions, np.arange(log_mel.shape[1]), row) for row in log_mel])
+    stretched -= stretched.mean()
+    return (stretched / (np.linalg.norm(stretched) + 1e-6)).reshape(-1).astype(np.float32)
+
+
+def words_to_text(words: List[str]) -> str:
+    '''
+    Converts the spotted words to the normalized move text, e.g. "knight takes f three" to "nxf3".
+
+    : param words: (List[str]) - spotted words.
+
+    : return: (str) - normalized move text.
+    '''
+    text = ""
+    for i, word in enumerate(words):
+        if i > 0 and words[i - 1] == "castle" and word in ("king", "queen"):
+            # the side of castling, the long one has one more "o"
+            text += "o" if word == "queen" else ""
+            continue
+        text += WORDS[word]
+    return text
+
+
+class SpeechRecognizerKeywordSpotting(SpeechRecognizerBase):
+    '''
+    Class for speech recognition of the closed move vocabulary by classifying spoken words with templates.
+    Templates of log-mel frames are made by python -m utils.speech_recognition.keyword_spotting_train.
+    Whisper is used as a fallback when the classification is uncertain.
+    '''
+
+    def __init__(self, config: dict) -> None:
+        '''
+        Initializes an instance of SpeechRecognizerKeywordSpotting.
+
+        : param config: (dict) - keyword spotting configuration object.
+
+        : return: (None) - this function does not return any value.
+        '''
+        super().__init__(config)
+        if not os.path.exists(config["templates_path"]):
+            raise FileNotFoundError(f"Keyword templates are not found in {config['templates_path']}. "
+                                    "Make them from recorded samples with python -m utils.speech_recognition.keyword_spotting_train.")
+        templates = np.load(config["templates_path"])
+        self._templates = templates["features"]
+        self._template_words = templates["labels"]
+        self._words = np.unique(self._template_words)
+
+        self._mel_transform = torchaudio.transforms.MelSpectrogram(sample_rate=config["sample_rate"],
+                                                                   n_fft=config["n_fft"],
+                                                                   hop_length=config["hop_length"],
+                                                                   n_mels=config["n_mels"])
+        self._vad = VoiceActivityDetector(config["vad"])
+        self._stream = None
+        self._resampler = None
+        # whisper is loaded on the first uncertain utterance only
+        self._fallback_model = None
+
+        self.num_spotted = 0
+        self.num_fallbacks = 0
+
+    def get_stats(self) -> dict:
+        '''
+        Gets statistics of the recognizer.
+
+        : return: (dict) - number of utterances recognized by templates, number of fallbacks and fallback rate.
+        '''
+        total = self.num_spotted + self.num_fallbacks
+        return {
+            "spotted": self.num_spotted,
+            "fallbacks": self.num_fallbacks,
+            "fallback_rate": self.num_fallbacks / total if total else 0.0,
+        }
+
+    def record(self) -> Any:
+        '''Records audio from micro.
+
+        : return: (Optional[np.ndarray]) - voiced segment of the utterance at the feature sample rate or None if nothing is said.
+        '''
+        if self._stream is None:
+            self._stream = AudioStream(sample_rate=self._config["sample_rate"],
+                                       channels=self._config["channels"],
+                                       buffer_seconds=self._config["buffer_seconds"],
+                                       frames_per_buffer=self._config["frames_per_buffer"])
+            if self._stream.sample_rate != self._config["sample_rate"]:
+                self._resampler = torchaudio.transforms.Resample(orig_freq=self._stream.sample_rate,
+                                                                 new_freq=self._config["sample_rate"])
+        samples = self._vad.listen(self._stream)
+        if samples is not None and self._resampler is not None:
+            samples = self._resampler(torch.from_numpy(samples)).numpy()
+        return samples
+
+    def _spot_words(self, samples: np.ndarray) -> Optional[List[List[Tuple[str, float]]]]:
+        '''
+        Classifies every word of the utterance by the nearest templates.
+
+        : param samples: (np.ndarray) - mono float32 samples at the feature sample rate.
+
+        : return: (Optional[List[List[Tuple[str, float]]]]) - candidate words with similarities for every spoken word,
+        None if the utterance cannot be split or any word is uncertain.
+        '''
+        log_mel = compute_log_mel(samples, self._mel_transform)
+        segments = split_words(log_mel, self._config)
+        if not segments or len(segments) > self._config["max_words"]:
+            return None
+
+        features = np.stack([word_features(log_mel[:, start:end], self._config["word_frames"]) for start, end in segments])
+        similarity = features @ self._templates.T
+        # the best template of every word class
+        class_similarity = np.stack([similarity[:, self._template_words == word].max(axis=1) for word in self._words], axis=1)
+
+        candidates = []
+        for word_similarity in class_similarity:
+            order = np.argsort(-word_similarity)[:self._config["max_alternatives"]]
+            if word_similarity[order[0]] < self._config["min_confidence"]:
+                return None
+            candidates.append([(str(self._words[index]), float(word_similarity[index])) for index in order
+                               if word_similarity[order[0]] - word_similarity[index] <= self._config["alternative_margin"]])
+        return candidates
+
+    def recognize(self, audio: Any, fen_positions: Optional[List[str]] = None) -> List[str]:
+        '''Recognizes the given audio.
+        Readings made of close alternatives of every word are rescored by the legal moves.
+
+        : param audio: (np.ndarray) - mono float32 samples at the feature sample rate.
+        : param fen_positions: (Optional[List[str]]) - detected positions the move can be made in.
+
+        : return: (List[str]) - recognized text in it, legal moves from the most probable one if positions are given.
+        '''
+        start_time = time.perf_counter()
+        candidates = self._spot_words(audio)
+        moves = []
+        if candidates is not None:
+            texts, scores = [], []
+            for reading in itertools.product(*candidates):
+                texts.append(words_to_text([word for word, _ in reading]))
+                scores.append(self._config["score_scale"] * sum(score for _, score in reading))
+            # scores are shifted by the best reading, the probabilities are relative anyway
+            scores = [score - max(scores) for score in scores]
+            moves = rescore_hypotheses(texts, scores, fen_positions)
+
+        if moves:
+            self.num_spotted += 1
+            print(f"Spotted {moves[0]} in {(time.perf_counter() - start_time)*1000:.0f} ms")
+            return moves
+
+        self.num_fallbacks += 1
+        if self._fallback_model is None:
+            from speech_recognizer.whisper_tiny.asr_whisper_tiny import SpeechRecognizerWhisper
+            self._fallback_model = SpeechRecognizerWhisper(load_config(self._config["fallback_config"]))
+        return self._fallback_model.recognize(audio, fen_positions)
+
+    def get_speech_end_time(self) -> Optional[float]:
+        '''Gets the end time of the last utterance found by VAD.
+
+        : return: (Optional[float]) - perf_counter time.
+        '''
+        return self._vad.speech_end_time
+
+    def close(self) -> None:
+        '''
+        Releases the microphone and the fallback model.
+
+        : return: (None) - this function does not return any value.
+        '''
+        if self._stream is not None:
+            self._stream.close()
+        if self._fallback_model is not None:
+            self._fallback_model.close()
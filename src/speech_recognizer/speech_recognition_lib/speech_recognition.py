@@ -1,7 +1,9 @@
-import re
-from typing import Any, List
+import numpy as np
+from typing import Any, List, Optional
 import speech_recognition as sr
 from speech_recognizer.speech_recognizer_base import SpeechRecognizerBase
+from utils.speech_recognition_utils import AudioStream, VoiceActivityDetector
+from utils.move_grammar import normalize_move_text, rescore_hypotheses
 
 class SpeechRecognizerLib(SpeechRecognizerBase):
     '''Class for speech recognition using SpeechRecognition library.'''
@@ -15,30 +17,52 @@ class SpeechRecognizerLib(SpeechRecognizerBase):
         '''
         super().__init__(config)
         self._recognizer = sr.Recognizer()
+        # utterances are cut by the same VAD as for whisper, so only the voiced segment is sent
+        self._stream = AudioStream(sample_rate=config["sample_rate"],
+                                   channels=config["channels"],
+                                   buffer_seconds=config["buffer_seconds"],
+                                   frames_per_buffer=config["frames_per_buffer"])
+        self._vad = VoiceActivityDetector(config["vad"])
 
     def record(self) -> Any:
         '''Records audio from micro.
         
-        : return: (Any) - recorded audio.
+        : return: (Optional[sr.AudioData]) - voiced segment of the utterance or None if nothing is said.
         '''
-        with sr.Microphone() as source:
-            print("Listening...")
-            audio = self._recognizer.listen(source)
-        return audio
+        samples = self._vad.listen(self._stream)
+        if samples is None:
+            return None
+        frames = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+        return sr.AudioData(frames, self._stream.sample_rate, 2)
 
-    def recognize(self, audio: Any) -> List[str]:
+    def recognize(self, audio: Any, fen_positions: Optional[List[str]] = None) -> List[str]:
         '''Recognizes the given audio.
         
         : param audio: (Any) - recorded audio file.
+        : param fen_positions: (Optional[List[str]]) - detected positions the move can be made in.
         
-        : return: (List[str]) - recognized text in it.'''
+        : return: (List[str]) - recognized text in it, its legal readings if positions are given.'''
         try:
-            text = self._recognizer.recognize_google(audio)
-            pattern = r'[^a-zA-Z0-9]'
-            text = re.sub(pattern, '', text).lower()
+            text = normalize_move_text(self._recognizer.recognize_google(audio))
             print(f"You said: {text}")
-            return [text]
+            return rescore_hypotheses([text], [0.0], fen_positions)
         except sr.UnknownValueError:
             print("Sorry, I couldn't understand that.")
         except sr.RequestError:
-            print("Sorry, there was an error processing your request.")
\ No newline at end of file
+            print("Sorry, there was an error processing your request.")
+        return []
+
+    def get_speech_end_time(self) -> Optional[float]:
+        '''Gets the end time of the last utterance found by VAD.
+
+        : return: (Optional[float]) - perf_counter time.
+        '''
+        return self._vad.speech_end_time
+
+    def close(self) -> None:
+        '''
+        Releases the microphone.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self._stream.close()
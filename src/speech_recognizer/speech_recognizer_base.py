@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any, List
+from typing import Any, List, Optional
 
 class SpeechRecognizerBase(ABC):
     '''Base class for speech recognition.'''
@@ -8,8 +8,15 @@ class SpeechRecognizerBase(ABC):
 
     @abstractmethod
     def record(self) -> Any:
-        '''Record audio from micro.'''
+        '''Record audio from micro, None if nothing is said.'''
 
     @abstractmethod
-    def recognize(self, audio: Any) -> List[str]:
-        '''Recognize the given audio.'''
\ No newline at end of file
+    def recognize(self, audio: Any, fen_positions: Optional[List[str]] = None) -> List[str]:
+        '''Recognize the given audio, preferring moves legal in the given positions.'''
+
+    def get_speech_end_time(self) -> Optional[float]:
+        '''Get perf_counter time of the end of the last utterance, if the engine detects it.'''
+        return None
+
+    def close(self) -> None:
+        '''Release the audio device and the model resources.'''
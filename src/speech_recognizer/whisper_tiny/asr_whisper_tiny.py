@@ -1,11 +1,12 @@
 import os
-import re
+import numpy as np
 import torch
 import torchaudio
 from pathlib import Path
-from typing import Any, List
-from transformers import WhisperProcessor, WhisperForConditionalGeneration
-from utils.speech_recognition_utils import record_audio
+from typing import Any, List, Optional, Tuple
+from transformers import LogitsProcessorList, WhisperProcessor, WhisperForConditionalGeneration
+from utils.speech_recognition_utils import AudioStream, VoiceActivityDetector
+from utils.move_grammar import MoveGrammar, MoveGrammarLogitsProcessor, normalize_move_text, rescore_hypotheses
 from speech_recognizer.speech_recognizer_base import SpeechRecognizerBase
 
 class SpeechRecognizerWhisper(SpeechRecognizerBase):
@@ -19,63 +20,117 @@ class SpeechRecognizerWhisper(SpeechRecognizerBase):
         : return: (None) - this function does not return any value.
         '''
         super().__init__(config)
-        self._audio_name = config["audio_name"]+'.wav'
         self._model_name = config["model_name"]
         self._model_path = '../assets/models/speech_recognition/'+self._model_name
         self._model_params = config["model_parameters"]
+        self._processor, self._model = self.load_model()
+
+        # tokens allowed after every move prefix are cached by the grammar for the whole session
+        self._grammar = MoveGrammar(self._processor.tokenizer) if self._model_params["constrained_decoding"] else None
+        self._vad = VoiceActivityDetector(config["vad"]) if config["vad"]["enabled"] else None
+        self._stream = None
+        self._resampler = None
+
+    def load_model(self) -> Tuple[WhisperProcessor, WhisperForConditionalGeneration]:
+        '''Loads the processor and the model from the local directory, downloading them on the first launch.
+        
+        : return: (Tuple[WhisperProcessor, WhisperForConditionalGeneration]) - processor and model.
+        '''
         if os.path.exists(self._model_path):
-            self._processor = WhisperProcessor.from_pretrained(self._model_path)
-            self._model = WhisperForConditionalGeneration.from_pretrained(self._model_path)
+            processor = WhisperProcessor.from_pretrained(self._model_path)
+            model = WhisperForConditionalGeneration.from_pretrained(self._model_path)
         else:
             Path(self._model_path).mkdir(parents=True, exist_ok=True)
-            self._processor = WhisperProcessor.from_pretrained("openai/whisper-tiny")
-            self._processor.save_pretrained(self._model_path)
+            processor = WhisperProcessor.from_pretrained("openai/whisper-tiny")
+            processor.save_pretrained(self._model_path)
+
+            model = WhisperForConditionalGeneration.from_pretrained("openai/whisper-tiny")
+            model.save_pretrained(self._model_path)
+        return processor, model
 
-            self._model = WhisperForConditionalGeneration.from_pretrained("openai/whisper-tiny")
-            self._model.save_pretrained(self._model_path)
+    def _open_stream(self) -> None:
+        '''Opens the microphone, it then captures all the time and utterances are cut from its buffer.
+        
+        : return: (None) - this function does not return any value.
+        '''
+        self._stream = AudioStream(sample_rate=self._model_params["sample_rate"],
+                                   channels=self._model_params["channels"],
+                                   buffer_seconds=self._model_params["buffer_seconds"],
+                                   frames_per_buffer=self._model_params["frames_per_buffer"])
+        if self._stream.sample_rate != self._model_params["sample_rate"]:
+            self._resampler = torchaudio.transforms.Resample(orig_freq=self._stream.sample_rate,
+                                                             new_freq=self._model_params["sample_rate"])
 
     def record(self) -> Any:
-        '''Records audio from micro.
+        '''Records audio from micro: the voiced segment of the next utterance or the fixed window if VAD is disabled.
+        
+        : return: (Optional[np.ndarray]) - recorded mono float32 samples at the stream sample rate or None if nothing is said.
+        '''
+        if self._stream is None:
+            self._open_stream()
+        if self._vad is not None:
+            return self._vad.listen(self._stream)
+        return self._stream.record(self._model_params["duration"])
+
+    def get_speech_end_time(self) -> Optional[float]:
+        '''Gets the end time of the last utterance found by VAD.
         
-        : return: (string) - name of recorded audio.
+        : return: (Optional[float]) - perf_counter time or None if VAD is disabled.
+        '''
+        return self._vad.speech_end_time if self._vad is not None else None
+
+    def prepare_features(self, audio: np.ndarray) -> torch.Tensor:
+        '''Converts samples to the model input features, resampling them to the model rate if needed.
+        
+        : param audio: (np.ndarray) - mono float32 samples at the stream sample rate, at the model one if no stream is open.
+        
+        : return: (torch.Tensor) - log-mel input features.
         '''
         sample_rate = self._model_params["sample_rate"]
-        duration = self._model_params["duration"]
-        channels = self._model_params["channels"]
-        record_audio(self._audio_name, duration=duration, sample_rate=sample_rate, channels=channels)
-        return self._audio_name
+        if self._resampler is not None:
+            audio = self._resampler(torch.from_numpy(audio)).numpy()
+        return self._processor(audio, sampling_rate=sample_rate, return_tensors="pt").input_features
 
-    def recognize(self, audio: Any) -> List[str]:
+    def recognize(self, audio: Any, fen_positions: Optional[List[str]] = None) -> List[str]:
         '''Recognizes the given audio.
+        Decoding is constrained to the move grammar and the N-best list is rescored by the legal moves.
         
-        : param audio: (string) - name of recorded audio file.
+        : param audio: (np.ndarray) - recorded mono float32 samples at the stream sample rate.
+        : param fen_positions: (Optional[List[str]]) - detected positions the move can be made in.
         
-        : return: (List[str]) - recognized text in it.
+        : return: (List[str]) - recognized text in it, legal moves from the most probable one if positions are given.
         '''
         num_beams   = self._model_params["num_beams"]
         max_length  = self._model_params["max_length"]
-        sample_rate = self._model_params["sample_rate"]
-
-        waveform, cur_sample_rate = torchaudio.load(self._audio_name)
-        os.remove(self._audio_name)
-
-        if cur_sample_rate != sample_rate:
-            resampler = torchaudio.transforms.Resample(orig_freq=cur_sample_rate, new_freq=sample_rate)
-            waveform = resampler(waveform)
 
-        input_features = self._processor(waveform.squeeze().numpy(), sampling_rate=sample_rate, return_tensors="pt").input_features
+        input_features = self.prepare_features(audio)
+        logits_processor = LogitsProcessorList()
+        if self._grammar is not None:
+            logits_processor.append(MoveGrammarLogitsProcessor(self._grammar))
 
         with torch.no_grad():
-            generated_ids = self._model.generate(
+            outputs = self._model.generate(
                 input_features,
                 num_beams=num_beams,
                 max_length=max_length,
-                num_return_sequences=num_beams
+                num_return_sequences=num_beams,
+                logits_processor=logits_processor,
+                output_scores=True,
+                return_dict_in_generate=True
             )
 
-        transcriptions = list(self._processor.batch_decode(generated_ids, skip_special_tokens=True))
-        pattern = r'[^a-zA-Z0-9]'
-        for i in range(len(transcriptions)): 
-            transcriptions[i] = re.sub(pattern, '', transcriptions[i]).lower()
+        transcriptions = [normalize_move_text(text)
+                          for text in self._processor.batch_decode(outputs.sequences, skip_special_tokens=True)]
+        # greedy search has no sequence scores, its only hypothesis does not need them
+        scores = outputs.sequences_scores.tolist() if num_beams > 1 else [0.0]*len(transcriptions)
 
-        return transcriptions
+        return rescore_hypotheses(transcriptions, scores, fen_positions)
+
+    def close(self) -> None:
+        '''
+        Releases the microphone.
+
+        : return: (None) - this function does not return any value.
+        '''
+        if self._stream is not None:
+            self._stream.close()
@@ -0,0 +1,27 @@
+import os
+import torch
+from typing import Tuple
+from transformers import WhisperProcessor, WhisperForConditionalGeneration
+from speech_recognizer.whisper_tiny.asr_whisper_tiny import SpeechRecognizerWhisper
+
+class SpeechRecognizerWhisperInt8(SpeechRecognizerWhisper):
+    '''
+    Class for speech recognition using whisper-tiny with INT8 dynamically quantized linear layers for CPU-only hosts.
+    The model is loaded from the local directory only, the decoder runs with the cached keys and values.
+    '''
+
+    def load_model(self) -> Tuple[WhisperProcessor, WhisperForConditionalGeneration]:
+        '''Loads the processor and the model from the local directory and quantizes the model linear layers.
+        
+        : return: (Tuple[WhisperProcessor, WhisperForConditionalGeneration]) - processor and quantized model.
+        '''
+        if not os.path.exists(self._model_path):
+            raise FileNotFoundError(f"Model is not found in {self._model_path}. Launch the whisper_tiny recognition "
+                                    "once with the Internet connection to save the model weights.")
+        processor = WhisperProcessor.from_pretrained(self._model_path, local_files_only=True)
+        model = WhisperForConditionalGeneration.from_pretrained(self._model_path, local_files_only=True).eval()
+        model.generation_config.use_cache = True
+
+        # weights are stored in INT8, activations are quantized on the fly by their actual range
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return processor, model
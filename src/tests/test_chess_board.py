@@ -0,0 +1,44 @@
+import numpy as np
+
+from utils.common_utils import load_config
+from utils.interface_utils import ButtonValue
+from utils.pieces_detection.chess_board import PIECES_CODES, ChessBoard, is_move_valid
+
+
+def make_chess_board(color: str) -> ChessBoard:
+    '''
+    Makes an empty chess board which takes the whole 800x800 screen.
+
+    : param color: (str) - which color user play.
+
+    : return: (ChessBoard) - chess board.
+    '''
+    chess_board = ChessBoard(load_config('../assets/configs/chess_board/config.json'), np.zeros(0), np.zeros((0, 4)), color)
+    chess_board._board_bbox = np.array([0, 0, 800, 800])
+    return chess_board
+
+
+def test_is_move_valid_accepts_promotion():
+    assert is_move_valid("e2e4")
+    assert is_move_valid("a7a8q")
+    assert not is_move_valid("a7a8k")
+    assert not is_move_valid("a7a9")
+
+
+def test_promotion_clicks_chosen_piece():
+    # the menu goes down from the promotion square: queen, knight, rook, bishop
+    chess_board = make_chess_board(ButtonValue.WHITE)
+    assert chess_board.chess_move_to_coordinates("e2e4") == ((450, 650), (450, 450))
+    assert chess_board.chess_move_to_coordinates("a7a8q") == ((50, 150), (50, 50), (50, 50))
+    assert chess_board.chess_move_to_coordinates("a7a8r") == ((50, 150), (50, 50), (50, 250))
+
+    chess_board = make_chess_board(ButtonValue.BLACK)
+    assert chess_board.chess_move_to_coordinates("h2h1n") == ((50, 150), (50, 50), (50, 150))
+
+
+def test_castling_rights_are_inferred():
+    chess_board = make_chess_board(ButtonValue.WHITE)
+    # the white king and the h1 rook are at home, the a1 rook has left and the black king has moved
+    for (x, y, piece) in ((4, 7, 'K'), (7, 7, 'R'), (1, 7, 'R'), (3, 0, 'k'), (0, 0, 'r')):
+        chess_board.set_field(x, y, PIECES_CODES[piece])
+    assert chess_board.get_fen() == "r2k4/8/8/8/8/8/8/1R2K2R w K - 0 30"
@@ -0,0 +1,21 @@
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from utils.move_grammar import rescore_hypotheses
+
+
+def test_promotion_is_accepted():
+    # the promotion square is empty, so the pawn can move there
+    fen_positions = ["4k3/P7/8/8/8/8/8/4K3 w - - 0 30"]
+    assert rescore_hypotheses(["a7a8q", "a8q"], [0.0, -1.0], fen_positions) == ["a7a8q"]
+    assert rescore_hypotheses(["a8n"], [0.0], fen_positions) == ["a7a8n"]
+
+
+def test_castling_is_accepted():
+    # castling rights are inferred by ChessBoard.get_fen from kings and rooks on their home squares
+    fen_positions = ["r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 30"]
+    assert rescore_hypotheses(["e1g1"], [0.0], fen_positions) == ["e1g1"]
+    assert rescore_hypotheses(["oo"], [0.0], fen_positions) == ["e1g1"]
+    assert rescore_hypotheses(["ooo"], [0.0], fen_positions) == ["e1c1"]
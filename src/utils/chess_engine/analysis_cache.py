@@ -0,0 +1,131 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+class AnalysisCache():
+    '''
+    Two-tier cache of engine analysis: in-memory LRU and optional sqlite database on disk.
+    Entries are dicts with keys "best_move", "score", "mate", "pv" and "search_time".
+    '''
+
+    def __init__(self, config: dict) -> None:
+        '''
+        Initializes an instance of AnalysisCache.
+
+        : param config: (dict) - cache configuration object.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self._config = config
+        self._memory_entries = config["memory_entries"]
+        self._disk_entries = config["disk_entries"]
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = None
+        if config["disk_path"]:
+            self._connection = sqlite3.connect(config["disk_path"], check_same_thread=False)
+            self._connection.execute("CREATE TABLE IF NOT EXISTS analysis "
+                                     "(key TEXT PRIMARY KEY, entry TEXT NOT NULL, last_used REAL NOT NULL)")
+            self._connection.commit()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.saved_time = 0.0
+
+    @staticmethod
+    def make_key(fen_position: str, search_parameters: dict) -> str:
+        '''
+        Makes cache key from the position and search parameters.
+        Move counters are dropped, because they do not change the analysis.
+
+        : param fen_position: (str) - FEN position.
+        : param search_parameters: (dict) - parameters changing the result, e.g. depth, skill level, threads and hash.
+
+        : return: (str) - cache key.
+        '''
+        position = ' '.join(fen_position.split()[:4])
+        parameters = ','.join(f"{name}={search_parameters[name]}" for name in sorted(search_parameters))
+        return f"{position}|{parameters}"
+
+    def get(self, key: str) -> Optional[dict]:
+        '''
+        Looks the key up in memory first and then on disk.
+
+        : param key: (str) - cache key.
+
+        : return: (Optional[dict]) - cached analysis or None on a miss.
+        '''
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                self.saved_time += entry["search_time"]
+                return entry
+
+            if self._connection is not None:
+                row = self._connection.execute("SELECT entry FROM analysis WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._connection.execute("UPDATE analysis SET last_used = ? WHERE key = ?", (time.time(), key))
+                    self._connection.commit()
+                    entry = json.loads(row[0])
+                    self._put_memory(key, entry)
+                    self.disk_hits += 1
+                    self.saved_time += entry["search_time"]
+                    return entry
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, entry: dict) -> None:
+        '''
+        Stores analysis in both tiers, evicting the least recently used entries above the size limits.
+
+        : param key: (str) - cache key.
+        : param entry: (dict) - analysis to store.
+
+        : return: (None) - this function does not return any value.
+        '''
+        with self._lock:
+            self._put_memory(key, entry)
+            if self._connection is not None:
+                self._connection.execute("INSERT OR REPLACE INTO analysis (key, entry, last_used) VALUES (?, ?, ?)",
+                                         (key, json.dumps(entry), time.time()))
+                self._connection.execute("DELETE FROM analysis WHERE key IN "
+                                         "(SELECT key FROM analysis ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                                         (self._disk_entries,))
+                self._connection.commit()
+
+    def _put_memory(self, key: str, entry: dict) -> None:
+        '''
+        Stores analysis in the in-memory LRU tier.
+
+        : param key: (str) - cache key.
+        : param entry: (dict) - analysis to store.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_stats(self) -> dict:
+        '''
+        Gets statistics of the cache.
+
+        : return: (dict) - hits of every tier, misses, hit rate and engine time saved by hits in seconds.
+        '''
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / total if total else 0.0,
+            "saved_time": self.saved_time,
+        }
@@ -0,0 +1,173 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+import chess.pgn
+from typing import Any, Iterable, Iterator, List, Tuple
+
+from chess_engine.stockfish.chess_engine_stockfish import ChessEngineStockfish
+from utils.common_utils import load_config
+from utils.chess_engine.game_tracker import make_board
+
+# engine of the worker process, created once by the pool initializer
+_worker_engine = None
+
+
+def _init_worker(config: dict) -> None:
+    """
+    Starts stockfish engine in the worker process.
+
+    : param config: (dict) - stockfish configuration object with the share of the worker.
+
+    : return: (None) - this function does not return any value.
+    """
+    global _worker_engine
+    _worker_engine = ChessEngineStockfish(config)
+
+
+def _analyse_task(task: Tuple[Any, str, List[str]]) -> Tuple[Any, dict]:
+    """
+    Analyses one position in the worker process.
+
+    : param task: (Tuple[Any, str, List[str]]) - tag, FEN position the moves start from and moves in UCI format.
+
+    : return: (Tuple[Any, dict]) - tag and analysis with FEN of the position, or error message.
+    """
+    (tag, fen_position, moves) = task
+    try:
+        analysis = _worker_engine.get_analysis(fen_position, moves)
+        return tag, {"fen": make_board(fen_position, moves).fen(), **analysis}
+    except Exception as e:
+        return tag, {"fen": fen_position, "error": str(e)}
+
+
+class EnginePool():
+    '''
+    Pool of stockfish processes for bulk analysis of positions.
+    CPU threads and hash budgets of the config are split between the workers.
+    '''
+
+    def __init__(self, config: dict, num_workers: int) -> None:
+        '''
+        Initializes an instance of EnginePool.
+
+        : param config: (dict) - stockfish configuration object.
+        : param num_workers: (int) - number of engine processes.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self._config = config
+        self._num_workers = num_workers
+        # sqlite cache is not shared between processes, so workers keep only the in-memory tier
+        worker_config = {**config,
+                         "threads": max(config["threads"] // num_workers, 1) if config["threads"] else None,
+                         "threads_percent": config["threads_percent"] / num_workers,
+                         "hash_percent": config["hash_percent"] / num_workers,
+                         "analysis_cache": {**config["analysis_cache"], "disk_path": None}}
+        self._pool = multiprocessing.Pool(num_workers, initializer=_init_worker, initargs=(worker_config,))
+
+        self.num_positions = 0
+        self.analysis_time = 0.0
+
+    def analyse(self, tasks: Iterable[Tuple[Any, str, List[str]]], chunk_size: int = 4) -> Iterator[Tuple[Any, dict]]:
+        '''
+        Analyses positions in the workers, yielding results as soon as they are ready.
+
+        : param tasks: (Iterable) - tags, FEN positions and moves played since them in UCI format.
+        : param chunk_size: (int) - number of positions sent to a worker at once.
+
+        : return: (Iterator[Tuple[Any, dict]]) - tags with analyses, out of the input order.
+        '''
+        # time spent by the caller between the results is not counted
+        start_time = time.perf_counter()
+        for tag, analysis in self._pool.imap_unordered(_analyse_task, tasks, chunk_size):
+            self.analysis_time += time.perf_counter() - start_time
+            self.num_positions += 1
+            yield tag, analysis
+            start_time = time.perf_counter()
+
+    def get_throughput(self) -> float:
+        '''
+        Gets analysis throughput.
+
+        : return: (float) - analysed positions per second.
+        '''
+        return self.num_positions / self.analysis_time if self.analysis_time else 0.0
+
+    def close(self) -> None:
+        '''
+        Stops the engine processes.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self._pool.close()
+        self._pool.join()
+
+
+def fens_to_tasks(lines: Iterable[str]) -> Iterator[Tuple[int, str, List[str]]]:
+    """
+    Makes analysis tasks from FEN positions, one per line.
+
+    : param lines: (Iterable[str]) - lines with FEN positions.
+
+    : return: (Iterator[Tuple[int, str, List[str]]]) - line numbers as tags, FEN positions and empty moves.
+    """
+    for line_number, line in enumerate(lines):
+        if line.strip():
+            yield line_number, line.strip(), []
+
+
+def pgn_to_tasks(pgn_file) -> Iterator[Tuple[Tuple[int, int], str, List[str]]]:
+    """
+    Makes analysis tasks from every position of every game of PGN file.
+
+    : param pgn_file: (TextIO) - opened PGN file.
+
+    : return: (Iterator) - (game number, ply) tags, starting FEN positions of the games and moves played before the ply.
+    """
+    game_number = 0
+    while True:
+        game = chess.pgn.read_game(pgn_file)
+        if game is None:
+            return
+        fen_position = game.board().fen()
+        moves = [move.uci() for move in game.mainline_moves()]
+        for ply in range(len(moves) + 1):
+            yield (game_number, ply), fen_position, moves[:ply]
+        game_number += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Analyses FEN positions or PGN games with a pool of stockfish processes')
+    parser.add_argument('--config', type=str, default='../assets/configs/chess_engine/stockfish/config.json',
+                        help='path to stockfish config')
+    parser.add_argument('--fens', type=str, default=None, help='file with FEN positions, one per line')
+    parser.add_argument('--pgn', type=str, default=None, help='PGN file, every position of every game is analysed')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of engine processes, by default one single-threaded process per thread of the budget')
+    parser.add_argument('--output', type=str, default='analysis.jsonl', help='path to output json lines file')
+    args = parser.parse_args()
+
+    if (args.fens is None) == (args.pgn is None):
+        raise ValueError("Exactly one of --fens and --pgn must be set.")
+
+    config = load_config(args.config)
+    num_workers = args.workers or max(int(os.cpu_count()*config["threads_percent"]), 1)
+    pool = EnginePool(config, num_workers)
+
+    input_path = args.fens if args.fens is not None else args.pgn
+    with open(input_path, 'r') as input_file, open(args.output, 'w') as output_file:
+        tasks = fens_to_tasks(input_file) if args.fens is not None else pgn_to_tasks(input_file)
+        for tag, analysis in pool.analyse(tasks):
+            output_file.write(json.dumps({"tag": tag, **analysis}) + '\n')
+            if pool.num_positions % 100 == 0:
+                print(f"Analysed {pool.num_positions} positions, {pool.get_throughput():.1f} positions/s")
+    pool.close()
+
+    print(f"Analysed {pool.num_positions} positions with {num_workers} workers, "
+          f"{pool.get_throughput():.1f} positions/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+import chess
+from typing import List, Optional
+
+
+def make_board(fen_position: str, moves: Optional[List[str]] = None) -> chess.Board:
+    '''
+    Makes board of the position reached by the moves.
+
+    : param fen_position: (str) - FEN position the moves start from.
+    : param moves: (Optional[List[str]]) - moves in UCI format.
+
+    : return: (chess.Board) - board with the moves in its move stack.
+    '''
+    board = chess.Board(fen_position)
+    for move in moves or []:
+        board.push_uci(move)
+    return board
+
+
+class GameTracker():
+    '''
+    Keeps the real game of one board across detected frames.
+    Played moves are inferred from the difference of consecutive detected boards, so castling rights,
+    en passant square, move counters and the moves history are known to the chess engine.
+    '''
+
+    def __init__(self, config: dict) -> None:
+        '''
+        Initializes an instance of GameTracker.
+
+        : param config: (dict) - game tracking configuration object.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self._config = config
+        self._board = None
+        self._color = None
+        # full FEN of the position our move was played in, so it is not searched twice
+        self._answered_fen = None
+        self.num_resyncs = 0
+
+    def update(self, fen_position: str) -> bool:
+        '''
+        Updates the game with the detected position.
+        The position is reached by the legal moves if possible, otherwise the game restarts from it.
+
+        : param fen_position: (str) - detected FEN position, side to move is the color of the user.
+
+        : return: (bool) - True if the game changed, False if the position is the same or invalid.
+        '''
+        placement = fen_position.split()[0]
+        if self._board is not None and self._board.board_fen() == placement:
+            return False
+
+        # a position reached by legal moves is valid even if the detected side to move is not
+        moves = self._infer_moves(placement) if self._board is not None else None
+        if moves is not None:
+            for move in moves:
+                self._board.push(move)
+            return True
+
+        board = self._board_from_detection(fen_position)
+        if not board.is_valid():
+            # misdetected frame, the game stays as it is
+            return False
+
+        self._board = board
+        self._color = board.turn
+        self.num_resyncs += 1
+        return True
+
+    @staticmethod
+    def _board_from_detection(fen_position: str) -> chess.Board:
+        '''
+        Makes board from the detected position, castling rights are inferred from kings and rooks placement.
+
+        : param fen_position: (str) - detected FEN position.
+
+        : return: (chess.Board) - board of the position.
+        '''
+        (placement, turn) = fen_position.split()[:2]
+        board = chess.Board(f"{placement} {turn} KQkq - 0 1")
+        board.castling_rights = board.clean_castling_rights()
+        return board
+
+    def _infer_moves(self, placement: str) -> Optional[List[chess.Move]]:
+        '''
+        Finds the shortest sequence of legal moves leading to the placement.
+
+        : param placement: (str) - pieces placement part of the FEN position.
+
+        : return: (Optional[List[chess.Move]]) - moves or None if the placement is not reachable in max_inferred_plies.
+        '''
+        board = self._board.copy(stack=False)
+        for plies in range(1, self._config["max_inferred_plies"] + 1):
+            moves = self._find_moves(board, placement, plies)
+            if moves is not None:
+                return moves
+        return None
+
+    def _find_moves(self, board: chess.Board, placement: str, plies: int) -> Optional[List[chess.Move]]:
+        '''
+        Searches legal moves sequences of the exact length leading to the placement.
+        Promotions and castling are ordinary legal moves, so they are found the same way.
+
+        : param board: (chess.Board) - board to search from.
+        : param placement: (str) - pieces placement part of the FEN position.
+        : param plies: (int) - length of the sequence.
+
+        : return: (Optional[List[chess.Move]]) - moves or None if nothing is found.
+        '''
+        for move in board.legal_moves:
+            board.push(move)
+            if plies == 1:
+                found = [] if board.board_fen() == placement else None
+            else:
+                found = self._find_moves(board, placement, plies - 1)
+            board.pop()
+            if found is not None:
+                return [move] + found
+        return None
+
+    def is_our_turn(self) -> bool:
+        '''
+        Checks whether the user has to move.
+
+        : return: (bool) - True if it is the turn of the user.
+        '''
+        return self._board is not None and self._board.turn == self._color
+
+    def needs_move(self) -> bool:
+        '''
+        Checks whether the user has to move and no move is played in the current position yet.
+        A search discarded because of a newer frame is repeated this way, even if the position did not change.
+
+        : return: (bool) - True if the current position has to be searched.
+        '''
+        return self.is_our_turn() and self._board.fen() != self._answered_fen
+
+    def mark_move_played(self) -> None:
+        '''
+        Remembers that the move is played in the current position.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self._answered_fen = self._board.fen()
+
+    def get_root_fen(self) -> str:
+        '''
+        Gets FEN position the tracked game started from.
+
+        : return: (str) - FEN position.
+        '''
+        return self._board.root().fen()
+
+    def get_moves(self) -> List[str]:
+        '''
+        Gets moves played since the root position.
+
+        : return: (List[str]) - moves in UCI format.
+        '''
+        return [move.uci() for move in self._board.move_stack]
+
+    def get_fen(self) -> str:
+        '''
+        Gets full FEN of the current position.
+
+        : return: (str) - FEN position.
+        '''
+        return self._board.fen()
@@ -1,4 +1,5 @@
 import math
+import os
 
 def find_nearest_power_of_two(number: int) -> int:
     '''
@@ -10,4 +11,40 @@ def find_nearest_power_of_two(number: int) -> int:
     : return: (int) - the neares power of two.
     '''
     power = math.log(number, 2)
-    return 2**(int(power))
\ No newline at end of file
+    return 2**(int(power))
+
+def get_engine_threads(config: dict) -> int:
+    '''
+    Gets number of engine threads: planned by the CPU budget if it is set, otherwise the share of all cores.
+
+    : param config: (dict) - engine configuration object.
+
+    : return: (int) - number of threads.
+    '''
+    if config["threads"]:
+        return config["threads"]
+    return max(int(os.cpu_count()*config["threads_percent"]), 1)
+
+def parse_info_line(info_line: str) -> dict:
+    '''
+    Parses UCI "info" line printed by the engine during the search.
+
+    : param info_line: (str) - line like "info depth 20 ... score cp 35 ... pv e2e4 e7e5".
+
+    : return: (dict) - depth, score in centipawns, mate in moves (None if there is no mate) and principal variation.
+    '''
+    tokens = info_line.split()
+    result = {"depth": None, "score": None, "mate": None, "pv": []}
+    for i, token in enumerate(tokens[:-1]):
+        if token == "depth":
+            result["depth"] = int(tokens[i+1])
+        elif token == "score" and i + 2 < len(tokens):
+            if tokens[i+1] == "cp":
+                result["score"] = int(tokens[i+2])
+            elif tokens[i+1] == "mate":
+                result["mate"] = int(tokens[i+2])
+        elif token == "pv":
+            result["pv"] = tokens[i+1:]
+            break
+
+    return result
@@ -0,0 +1,49 @@
+import chess
+from typing import Optional
+
+class TimeManager():
+    '''
+    Search budget of one position for adaptive search mode.
+    Movetime is scaled by the number of legal moves and bounded by the remaining clock,
+    and the search stops early once the best move is stable for several depths.
+    '''
+
+    def __init__(self, config: dict, board: chess.Board, remaining_time: Optional[float] = None) -> None:
+        '''
+        Initializes an instance of TimeManager.
+
+        : param config: (dict) - time management configuration object.
+        : param board: (chess.Board) - position to search.
+        : param remaining_time: (Optional[float]) - remaining clock of the side to move in seconds, if known.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self._config = config
+        self._best_moves = {}
+        num_legal_moves = board.legal_moves.count()
+        self._forced = num_legal_moves <= 1
+
+        budget = config["move_budget"]
+        if remaining_time is not None:
+            budget = min(budget, remaining_time / config["moves_to_go"])
+        # positions with few replies, e.g. recaptures and check evasions, need less time than open ones
+        scale = min(max(num_legal_moves / config["reference_legal_moves"], config["min_scale"]), config["max_scale"])
+        self.movetime = min(max(budget * scale, config["min_movetime"]), config["max_movetime"])
+        self.max_depth = config["max_depth"]
+
+    def update(self, depth: int, best_move: str) -> bool:
+        '''
+        Registers the best move of the finished depth.
+
+        : param depth: (int) - search depth.
+        : param best_move: (str) - best move at this depth in UCI format.
+
+        : return: (bool) - True if the search can be stopped.
+        '''
+        self._best_moves[depth] = best_move
+        if self._forced or depth >= self.max_depth:
+            return True
+
+        stable_depths = self._config["stable_depths"]
+        moves = {self._best_moves.get(previous_depth) for previous_depth in range(depth - stable_depths + 1, depth + 1)}
+        return depth >= self._config["min_depth"] and moves == {best_move}
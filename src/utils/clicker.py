@@ -7,19 +7,18 @@ class MouseClicker():
     def __init__(self, config: dict):
         self._config = config
 
-    def make_move(self, coordinates: Tuple[Tuple[int, int], Tuple[int, int]]) -> None:
+    def make_move(self, coordinates: Tuple[Tuple[int, int], ...]) -> None:
         '''
         Make move based on screen coordinates.
         
-        : param coordinates: (Tuple[Tuple[int, int], Tuple[int, int]]) - coordinates in format
-        ((x1, y1), (x2, y2)).
+        : param coordinates: (Tuple[Tuple[int, int], ...]) - coordinates in format
+        ((x1, y1), (x2, y2)), a promotion has the third pair of the chosen piece.
 
         : return: (None) - this function does not return any value.
         '''
-        ((x1, y1), (x2, y2)) = coordinates
-        
-        pyautogui.click(x=x1, y=y1)
-        time.sleep(self._config["move_time"])
-        pyautogui.click(x=x2, y=y2)
+        for i, (x, y) in enumerate(coordinates):
+            if i > 0:
+                time.sleep(self._config["move_time"])
+            pyautogui.click(x=x, y=y)
 
         print("Success!")
\ No newline at end of file
@@ -0,0 +1,135 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from utils.interface_utils import ComponentStatus
+
+class ComponentLoader():
+    '''
+    Initializes program components on background threads.
+    Eager components start loading at once in parallel, lazy ones on the first request.
+    '''
+
+    def __init__(self, on_change: Optional[Callable[[Dict[str, str]], None]] = None) -> None:
+        '''
+        Initializes an instance of ComponentLoader.
+
+        : param on_change: (Optional[Callable]) - called with statuses of all components when any of them changes.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self._on_change = on_change
+        self._lock = threading.Lock()
+        self._components = {}
+        self._start_time = time.perf_counter()
+        self._startup_reported = False
+
+    def register(self, name: str, factory: Callable[[], Any], lazy: bool = False) -> None:
+        '''
+        Registers a component and starts loading it unless it is lazy.
+
+        : param name: (str) - name of the component shown to the user.
+        : param factory: (Callable) - creates the component, heavy modules should be imported inside it.
+        : param lazy: (bool) - load the component only when it is requested.
+
+        : return: (None) - this function does not return any value.
+        '''
+        with self._lock:
+            self._components[name] = {"factory": factory,
+                                      "lazy": lazy,
+                                      "status": ComponentStatus.NOT_LOADED,
+                                      "instance": None,
+                                      "load_time": None,
+                                      "ready": threading.Event()}
+        self._notify()
+        if not lazy:
+            self.request(name)
+
+    def request(self, name: str) -> None:
+        '''
+        Starts loading the component if it is not loaded yet.
+
+        : param name: (str) - name of the component.
+
+        : return: (None) - this function does not return any value.
+        '''
+        with self._lock:
+            component = self._components[name]
+            if component["status"] != ComponentStatus.NOT_LOADED:
+                return
+            component["status"] = ComponentStatus.LOADING
+        self._notify()
+        threading.Thread(target=self._load, args=(name,), daemon=True).start()
+
+    def _load(self, name: str) -> None:
+        '''
+        Creates the component on the loading thread.
+
+        : param name: (str) - name of the component.
+
+        : return: (None) - this function does not return any value.
+        '''
+        component = self._components[name]
+        start_time = time.perf_counter()
+        try:
+            component["instance"] = component["factory"]()
+            component["status"] = ComponentStatus.READY
+        except Exception as e:
+            component["status"] = ComponentStatus.FAILED
+            print(f"Cannot initialize {name}. Error message:\n{str(e)}")
+        component["load_time"] = time.perf_counter() - start_time
+        component["ready"].set()
+        print(f"{name.capitalize()}: {component['status'].value} in {component['load_time']:.2f} s")
+        self._notify()
+
+        with self._lock:
+            eager = [other for other in self._components.values() if not other["lazy"]]
+            startup_finished = (not self._startup_reported and not component["lazy"]
+                                and all(other["ready"].is_set() for other in eager))
+            self._startup_reported = self._startup_reported or startup_finished
+        if startup_finished:
+            print(f"Startup took {time.perf_counter() - self._start_time:.2f} s: " +
+                  ", ".join(f"{other_name} {times:.2f} s" for other_name, times in self.get_load_times().items()))
+
+    def get(self, name: str, timeout: Optional[float] = None) -> Optional[Any]:
+        '''
+        Gets the component, requesting it if it is lazy and waiting for it at most timeout seconds.
+
+        : param name: (str) - name of the component.
+        : param timeout: (Optional[float]) - max waiting time in seconds, wait forever if None.
+
+        : return: (Optional[Any]) - the component or None if it is not ready in time or failed to load.
+        '''
+        self.request(name)
+        component = self._components[name]
+        if not component["ready"].wait(timeout):
+            return None
+        return component["instance"]
+
+    def get_statuses(self) -> Dict[str, str]:
+        '''
+        Gets loading statuses of all components.
+
+        : return: (Dict[str, str]) - status of every component by its name.
+        '''
+        with self._lock:
+            return {name: component["status"].value for name, component in self._components.items()}
+
+    def get_load_times(self) -> Dict[str, float]:
+        '''
+        Gets loading times of the loaded components.
+
+        : return: (Dict[str, float]) - loading time in seconds of every loaded component by its name.
+        '''
+        with self._lock:
+            return {name: component["load_time"] for name, component in self._components.items()
+                    if component["load_time"] is not None}
+
+    def _notify(self) -> None:
+        '''
+        Passes the statuses to the on_change callback.
+
+        : return: (None) - this function does not return any value.
+        '''
+        if self._on_change is not None:
+            self._on_change(self.get_statuses())
@@ -35,13 +35,36 @@ class LabelValue(str, Enum):
     - LabelValue.TITLE: "Main menu"
     - LabelValue.COLOR_QUESTION: "What color do you play?"
     - LabelValue.MODE_QUESTION: "Choose the program mode"
+    - LabelValue.COMPONENTS_STATUS: "Components:"
     """
     TITLE = "Main menu"
     COLOR_QUESTION = "What color do you play?"
     MODE_QUESTION = "Choose the program mode:"
+    COMPONENTS_STATUS = "Components:"
 
     def __eq__(self, other):
         return self.value == other
 
     def __hash__(self):
-        return hash(self.value)
\ No newline at end of file
+        return hash(self.value)
+
+class ComponentStatus(str, Enum):
+    """
+    Enumeration for program components loading states.
+
+    Possible values:
+    - ComponentStatus.NOT_LOADED: "not loaded"
+    - ComponentStatus.LOADING: "loading"
+    - ComponentStatus.READY: "ready"
+    - ComponentStatus.FAILED: "failed"
+    """
+    NOT_LOADED = "not loaded"
+    LOADING = "loading"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __eq__(self, other):
+        return self.value == other
+
+    def __hash__(self):
+        return hash(self.value)
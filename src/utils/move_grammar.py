@@ -0,0 +1,195 @@
+import math
+import re
+import chess
+import torch
+from typing import Dict, List, Optional, Tuple
+from transformers import LogitsProcessor
+
+FILES = "abcdefgh"
+RANKS = "12345678"
+PIECES = "kqrbn"
+PROMOTIONS = "qrbn"
+
+# normalized (lowercase alphanumeric) forms of coordinate and SAN moves as sequences of character classes
+MOVE_TEMPLATES = [
+    [FILES, RANKS, FILES, RANKS], [FILES, RANKS, FILES, RANKS, PROMOTIONS],
+    [FILES, RANKS], [FILES, RANKS, PROMOTIONS],
+    [FILES, "x", FILES, RANKS], [FILES, "x", FILES, RANKS, PROMOTIONS],
+    [PIECES, FILES, RANKS], [PIECES, "x", FILES, RANKS],
+    [PIECES, FILES, FILES, RANKS], [PIECES, RANKS, FILES, RANKS], [PIECES, FILES, RANKS, FILES, RANKS],
+    [PIECES, FILES, "x", FILES, RANKS], [PIECES, RANKS, "x", FILES, RANKS], [PIECES, FILES, RANKS, "x", FILES, RANKS],
+    ["o", "o"], ["o", "o", "o"],
+]
+
+# characters of the transcription dropped by normalization between the parts of a move
+SEPARATORS = " ,.-=+#"
+
+
+def normalize_move_text(text: str) -> str:
+    '''
+    Normalizes the transcription the same way as the recognized text: lowercase alphanumeric characters only.
+
+    : param text: (str) - transcription.
+
+    : return: (str) - normalized text.
+    '''
+    return re.sub(r'[^a-zA-Z0-9]', '', text).lower()
+
+
+def match_move_templates(text: str) -> Tuple[bool, bool, bool]:
+    '''
+    Matches the normalized text against the move templates.
+
+    : param text: (str) - normalized text.
+
+    : return: (Tuple[bool, bool, bool]) - whether the text is a prefix of a move, a complete move
+    and whether a longer move starts with it.
+    '''
+    is_prefix, is_complete, is_extendable = False, False, False
+    for template in MOVE_TEMPLATES:
+        if len(template) < len(text) or any(char not in allowed for char, allowed in zip(text, template)):
+            continue
+        is_prefix = True
+        is_complete = is_complete or len(template) == len(text)
+        is_extendable = is_extendable or len(template) > len(text)
+    return is_prefix, is_complete, is_extendable
+
+
+def text_to_moves(text: str, board: chess.Board) -> List[str]:
+    '''
+    Finds the legal moves the normalized text can stand for.
+    Lowercase SAN is ambiguous, e.g. "b" is a file or a bishop, so every reading is tried.
+
+    : param text: (str) - normalized text.
+    : param board: (chess.Board) - position the move is made in.
+
+    : return: (List[str]) - legal moves in UCI format.
+    '''
+    moves = set()
+    if re.fullmatch(r'[a-h][1-8][a-h][1-8][qrbn]?', text):
+        move = chess.Move.from_uci(text)
+        if move in board.legal_moves:
+            moves.add(move.uci())
+
+    readings = [text]
+    if text and text[0] in PIECES:
+        readings.append(text[0].upper() + text[1:])
+    if re.fullmatch(r'o{2,3}', text):
+        readings.append("-".join("O" * len(text)))
+    if re.search(r'[1-8][qrbn]$', text):
+        readings += [reading[:-1] + "=" + reading[-1].upper() for reading in list(readings)]
+
+    for reading in readings:
+        try:
+            moves.add(board.parse_san(reading).uci())
+        except ValueError:
+            continue
+    return sorted(moves)
+
+
+def rescore_hypotheses(texts: List[str], scores: List[float], fen_positions: Optional[List[str]]) -> List[str]:
+    '''
+    Rescores the N-best transcriptions by the legal moves of the detected positions.
+    Hypotheses without a legal reading are dropped, scores of hypotheses meaning the same move are summed.
+
+    : param texts: (List[str]) - normalized transcriptions.
+    : param scores: (List[float]) - log-probabilities of the transcriptions.
+    : param fen_positions: (Optional[List[str]]) - detected positions, the texts are returned as is if None.
+
+    : return: (List[str]) - legal moves in UCI format from the most probable one.
+    '''
+    if not fen_positions:
+        return [text for _, text in sorted(zip(scores, texts), key=lambda pair: -pair[0])]
+
+    boards = [chess.Board(fen_position) for fen_position in fen_positions]
+    probabilities = {}
+    for text, score in zip(texts, scores):
+        for board in boards:
+            moves = text_to_moves(text, board)
+            # the hypothesis probability is split between its readings
+            for move in moves:
+                probabilities[move] = probabilities.get(move, 0.0) + math.exp(score) / len(moves)
+    return sorted(probabilities, key=probabilities.get, reverse=True)
+
+
+class MoveGrammar():
+    '''
+    Vocabulary of the tokens that can form a move and the cache of the tokens allowed after every decoded prefix.
+    '''
+
+    def __init__(self, tokenizer) -> None:
+        '''
+        Initializes an instance of MoveGrammar.
+
+        : param tokenizer: (PreTrainedTokenizer) - tokenizer of the speech recognition model.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self.eos_token_id = tokenizer.eos_token_id
+        allowed_chars = set(FILES + RANKS + PIECES + "ox" + SEPARATORS)
+        self._token_texts = {}
+        for token_id, text in enumerate(tokenizer.batch_decode([[token_id] for token_id in range(len(tokenizer))])):
+            if token_id < self.eos_token_id and text and set(text.lower()) <= allowed_chars:
+                self._token_texts[token_id] = normalize_move_text(text)
+        self._allowed_cache: Dict[Tuple[str, bool], torch.Tensor] = {}
+
+    def get_text(self, token_ids: List[int]) -> Tuple[str, bool]:
+        '''
+        Gets the normalized text of the decoded tokens.
+
+        : param token_ids: (List[int]) - decoded tokens after the prompt.
+
+        : return: (Tuple[str, bool]) - normalized text and whether the last token is a separator.
+        '''
+        texts = [self._token_texts.get(token_id, "") for token_id in token_ids]
+        return "".join(texts), bool(texts) and texts[-1] == ""
+
+    def get_allowed_tokens(self, text: str, after_separator: bool) -> torch.Tensor:
+        '''
+        Gets tokens keeping the text a prefix of a move: move characters, single separators between them
+        and the end of text after a complete move. Only the end of text is allowed when the move cannot be longer.
+
+        : param text: (str) - normalized decoded text.
+        : param after_separator: (bool) - whether the last token is a separator.
+
+        : return: (torch.Tensor) - ids of the allowed tokens.
+        '''
+        key = (text, after_separator)
+        if key not in self._allowed_cache:
+            _, is_complete, is_extendable = match_move_templates(text)
+            allowed = [self.eos_token_id] if is_complete else []
+            if is_extendable:
+                for token_id, token_text in self._token_texts.items():
+                    if token_text:
+                        if match_move_templates(text + token_text)[0]:
+                            allowed.append(token_id)
+                    elif text and not after_separator:
+                        allowed.append(token_id)
+            self._allowed_cache[key] = torch.tensor(allowed or [self.eos_token_id], dtype=torch.long)
+        return self._allowed_cache[key]
+
+
+class MoveGrammarLogitsProcessor(LogitsProcessor):
+    '''
+    Masks the tokens that cannot continue a move, so the beams are spent on moves only.
+    A new instance is created for every generate call, the first call finds the prompt length.
+    '''
+
+    def __init__(self, grammar: MoveGrammar) -> None:
+        '''
+        Initializes an instance of MoveGrammarLogitsProcessor.
+
+        : param grammar: (MoveGrammar) - move grammar of the model tokenizer.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self._grammar = grammar
+        self._prompt_length = None
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        if self._prompt_length is None:
+            self._prompt_length = input_ids.shape[1]
+        mask = torch.full_like(scores, -math.inf)
+        for i, token_ids in enumerate(input_ids[:, self._prompt_length:].tolist()):
+            mask[i, self._grammar.get_allowed_tokens(*self._grammar.get_text(token_ids))] = 0
+        return scores + mask
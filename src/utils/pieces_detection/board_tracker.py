@@ -0,0 +1,106 @@
+import numpy as np
+from typing import Tuple
+
+class BoardTracker():
+    '''Class for tracking the chess board region on the monitor.'''
+
+    def __init__(self, config: dict, monitor: dict) -> None:
+        '''
+        Initializes an instance of BoardTracker.
+
+        : param config: (dict) - board tracking configuration object.
+        : param monitor: (dict) - mss monitor with keys 'left', 'top', 'width' and 'height'.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self._config = config
+        self._enabled = config["enabled"]
+        self._margin = config["margin"]
+        self._drift_tolerance = config["drift_tolerance"]
+        self._monitor = monitor
+        self._region = None
+
+    def is_tracking(self) -> bool:
+        '''
+        Checks whether only the board region is captured now.
+
+        : return: (bool) - True if the board region is tracked, False if the whole monitor is captured.
+        '''
+        return self._region is not None
+
+    def reset(self) -> None:
+        '''
+        Forgets the board region, so the next frame is captured from the whole monitor.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self._region = None
+
+    def get_region(self) -> dict:
+        '''
+        Gets the region to capture.
+
+        : return: (dict) - mss region with keys 'left', 'top', 'width' and 'height'.
+        '''
+        if self._region is None:
+            return {key: self._monitor[key] for key in ('left', 'top', 'width', 'height')}
+        return self._region
+
+    def get_offset(self) -> Tuple[int, int]:
+        '''
+        Gets the offset of the captured region inside the monitor frame.
+
+        : return: (Tuple[int, int]) - (x, y) offset in pixels.
+        '''
+        region = self.get_region()
+        return (region['left'] - self._monitor['left'], region['top'] - self._monitor['top'])
+
+    def update(self, board_bbox: np.ndarray) -> bool:
+        '''
+        Updates the tracked region with a newly detected board.
+        The region is kept while the board stays inside it with enough margin,
+        otherwise tracking is dropped and the next frame re-localizes the board on the whole monitor.
+
+        : param board_bbox: (numpy.ndarray) - bbox covering all boards in monitor frame coordinates.
+
+        : return: (bool) - whether the captured region has changed.
+        '''
+        if not self._enabled:
+            return False
+
+        x_min, y_min, x_max, y_max = [float(value) for value in board_bbox]
+        margin_x = (x_max - x_min) * self._margin
+        margin_y = (y_max - y_min) * self._margin
+
+        if self._region is not None:
+            offset_x, offset_y = self.get_offset()
+            distances = np.array([x_min - offset_x,
+                                  y_min - offset_y,
+                                  offset_x + self._region['width'] - x_max,
+                                  offset_y + self._region['height'] - y_max])
+            # sides clipped by the monitor border cannot be drifted over
+            clipped = np.array([offset_x == 0,
+                                offset_y == 0,
+                                offset_x + self._region['width'] == self._monitor['width'],
+                                offset_y + self._region['height'] == self._monitor['height']])
+            distances[clipped] = np.inf
+            tolerances = np.array([margin_x, margin_y, margin_x, margin_y]) * self._drift_tolerance
+            if (distances < tolerances).any():
+                self.reset()
+                return True
+            return False
+
+        left = max(int(x_min - margin_x), 0)
+        top = max(int(y_min - margin_y), 0)
+        right = min(int(x_max + margin_x), self._monitor['width'])
+        bottom = min(int(y_max + margin_y), self._monitor['height'])
+        if right <= left or bottom <= top:
+            return False
+
+        self._region = {
+            'left': self._monitor['left'] + left,
+            'top': self._monitor['top'] + top,
+            'width': right - left,
+            'height': bottom - top,
+        }
+        return True
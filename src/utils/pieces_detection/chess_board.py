@@ -1,17 +1,32 @@
+import re
+import chess
 import numpy as np
-from typing import Tuple
+from typing import List, Optional, Tuple
 from utils.interface_utils import ButtonValue
 
+# pieces are stored as int8 codes: positive for white, negative for black, 0 for an empty field
+PIECES_CODES = {'P': 1, 'N': 2, 'B': 3, 'R': 4, 'Q': 5, 'K': 6,
+                'p': -1, 'n': -2, 'b': -3, 'r': -4, 'q': -5, 'k': -6}
+# symbol of a code is PIECES_SYMBOLS[code + 6], '1' marks an empty field
+PIECES_SYMBOLS = np.array(['k', 'q', 'r', 'b', 'n', 'p', '1', 'P', 'N', 'B', 'R', 'Q', 'K'])
+
+# Zobrist keys for every code on every field and for the side to move
+ZOBRIST_KEYS = np.random.default_rng(2024).integers(0, np.iinfo(np.int64).max, size=(13, 64), dtype=np.uint64)
+ZOBRIST_KEYS[6] = 0
+ZOBRIST_BLACK_TO_MOVE = np.uint64(np.random.default_rng(2025).integers(0, np.iinfo(np.int64).max, dtype=np.uint64))
+
 class ChessBoard():
     '''Class for chess board'''
 
-    def __init__(self, config: dict, labels: np.ndarray, bboxes: np.ndarray, color: str) -> None:
+    def __init__(self, config: dict, labels: np.ndarray, bboxes: np.ndarray, color: str, scores: Optional[np.ndarray] = None) -> None:
         '''Initializes an instance of ChessBoard.
 
         : param config: (dict) - chess board configuration object.
         : param labels: (numpy.ndarray) - labels received from the model.
         : param bboxes: (numpy.ndarray) - bboxes received from the model.
         : param color: (bool) - which color user play.
+        : param scores: (Optional[numpy.ndarray]) - scores received from the model, used to resolve
+        several pieces found on one field.
 
         : return: (None) - this function doesn't return any value.
         '''
@@ -23,105 +38,236 @@ class ChessBoard():
         self._pieces_indexes = config["pieces_indexes"]
         self._pieces_names = config["pieces_names"]
         self._board_fields = config["board_fields"]
+        # pieces of the promotion menu from the promotion square towards the center of the board
+        self._promotion_order = config["promotion_order"]
         self._board_constant = config["board_constant"]
-        self._labels = labels
-        self._bboxes = bboxes
+        self._labels = np.asarray(labels)
+        self._bboxes = np.asarray(bboxes, dtype=np.float32).reshape(-1, 4)
+        self._scores = np.ones(len(self._labels), dtype=np.float32) if scores is None else np.asarray(scores)
+        self._board_bbox = None
         self._color  = 'b' if color == ButtonValue.BLACK else 'w'
 
+        # lookup from model label to piece code, labels which are not pieces get 0
+        self._labels_codes = np.zeros(max(self._pieces_indexes) + 1, dtype=np.int8)
+        for index, name in self._pieces_indexes.items():
+            if name in self._pieces_names:
+                self._labels_codes[index] = PIECES_CODES[self._pieces_names[name]]
+
+        self._board = np.zeros((8, 8), dtype=np.int8)
+        self._hash = np.uint64(0)
+        self._fen = None
+        # score of the piece on every field and the runner-up piece detected on the same field
+        self._fields_scores = np.zeros(64, dtype=np.float32)
+        self._alternatives = np.zeros(64, dtype=np.int8)
+        self._is_valid = False
+
     def detections_to_fen(self) -> str:
         '''
         Function that converts given image to the FEN position.
+        The position is repaired, is_valid tells whether it can be analysed.
 
         : return: (str) - FEN position for chosen color.
         '''
+        self.fill_board()
+        self._is_valid = self.repair()
+        return self.get_fen()
+
+    def fill_board(self) -> None:
+        '''
+        Fills the board from detections in one vectorized pass.
+        When several pieces fall on one field, the piece with the highest score is kept.
+
+        : return: (None) - this function doesn't return any value.
+        '''
         board_const = [i for i in self._pieces_indexes if self._pieces_indexes[i]==self._board_constant][0]
         board_index = np.where(self._labels==board_const)[0][0]
         self._board_bbox = self._bboxes[board_index]
 
-        chess_board = np.full((8, 8), None)
-        num_detections = len(self._bboxes)
-        for i in range(num_detections):
-            if i != board_index:
-                piece_bbox = self._bboxes[i]
-                x, y = self._find_field_by_coordinates(self._board_bbox, piece_bbox)
-                label = self._pieces_names[self._pieces_indexes[self._labels[i]]]
-                if max(x, y) < 8 and min(x, y) >= 0:
-                    chess_board[y][x] = label
+        pieces_mask = np.arange(len(self._labels)) != board_index
+        codes = self._labels_codes[self._labels[pieces_mask].astype(np.int64)]
+        x_fields, y_fields = self._find_fields_by_coordinates(self._board_bbox, self._bboxes[pieces_mask])
+        valid = (codes != 0) & (x_fields >= 0) & (x_fields < 8) & (y_fields >= 0) & (y_fields < 8)
 
+        fields = (y_fields * 8 + x_fields)[valid]
+        codes, scores = codes[valid], self._scores[pieces_mask][valid]
         if self._color == 'b':
-            chess_board = np.rot90(chess_board, 2)
+            fields = 63 - fields
+
+        # sort by field and descending score, so the first piece of every field wins
+        order = np.lexsort((-scores, fields))
+        (fields, codes, scores) = (fields[order], codes[order], scores[order])
+        unique_fields, first_indexes = np.unique(fields, return_index=True)
 
-        if (chess_board == None).all():
+        board = np.zeros(64, dtype=np.int8)
+        board[unique_fields] = codes[first_indexes]
+        if not board.any():
             raise ValueError("Empty board.")
 
-        return self._filled_board_to_fen(chess_board)
+        self._fields_scores = np.zeros(64, dtype=np.float32)
+        self._fields_scores[unique_fields] = scores[first_indexes]
+        second_indexes = np.minimum(first_indexes + 1, len(fields) - 1)
+        has_second = (fields[second_indexes] == unique_fields) & (codes[second_indexes] != codes[first_indexes])
+        self._alternatives = np.zeros(64, dtype=np.int8)
+        self._alternatives[unique_fields[has_second]] = codes[second_indexes[has_second]]
+
+        self._board = board.reshape(8, 8)
+        self._hash = np.bitwise_xor.reduce(ZOBRIST_KEYS[board.astype(np.int64) + 6, np.arange(64)])
+        if self._color == 'b':
+            self._hash ^= ZOBRIST_BLACK_TO_MOVE
+        self._fen = None
+
+    def repair(self) -> bool:
+        '''
+        Fixes positions broken by detector glitches, e.g. two kings of one color or pawns on the back rank.
+        The offending piece with the lowest score is replaced by the runner-up detection of its field or removed.
+        A missing king is restored only if it is the runner-up detection of some field.
+
+        : return: (bool) - True if the position is valid after the repair.
+        '''
+        for _ in range(64):
+            status = chess.Board(self.get_fen()).status()
+            if status == chess.STATUS_VALID:
+                return True
+
+            field = self._find_offending_field(status)
+            if field is None:
+                return False
+            (y, x) = divmod(field, 8)
+            self.set_field(x, y, int(self._alternatives[field]))
+            self._alternatives[field] = 0
+            self._fields_scores[field] = 0.0
+        return False
+
+    def _find_offending_field(self, status: int) -> Optional[int]:
+        '''
+        Chooses the field to fix for the first repairable error of the position.
+
+        : param status: (int) - status flags of chess.Board.status().
+
+        : return: (Optional[int]) - field index in FEN order or None if the errors cannot be repaired.
+        '''
+        board = self._board.reshape(-1)
+        candidates = None
+        for king, missing_flag in ((PIECES_CODES['K'], chess.STATUS_NO_WHITE_KING), (PIECES_CODES['k'], chess.STATUS_NO_BLACK_KING)):
+            if status & missing_flag:
+                # the king replaces the least confident piece among the fields where it was the runner-up
+                candidates = np.flatnonzero((self._alternatives == king) & (np.abs(board) != 6))
+                return int(candidates[self._fields_scores[candidates].argmin()]) if len(candidates) else None
+
+        if status & chess.STATUS_TOO_MANY_KINGS:
+            candidates = np.flatnonzero(board == (6 if (board == 6).sum() > 1 else -6))
+        elif status & chess.STATUS_PAWNS_ON_BACKRANK:
+            candidates = np.flatnonzero((np.abs(board) == 1) & ((np.arange(64) < 8) | (np.arange(64) >= 56)))
+        elif status & (chess.STATUS_TOO_MANY_WHITE_PAWNS | chess.STATUS_TOO_MANY_BLACK_PAWNS):
+            candidates = np.flatnonzero(board == (1 if status & chess.STATUS_TOO_MANY_WHITE_PAWNS else -1))
+        elif status & (chess.STATUS_TOO_MANY_WHITE_PIECES | chess.STATUS_TOO_MANY_BLACK_PIECES):
+            candidates = np.flatnonzero(board > 0 if status & chess.STATUS_TOO_MANY_WHITE_PIECES else board < 0)
+            candidates = candidates[np.abs(board[candidates]) != 6]
+
+        if candidates is None or len(candidates) == 0:
+            return None
+        return int(candidates[self._fields_scores[candidates].argmin()])
 
     @staticmethod
-    def _find_field_by_coordinates(board_bbox: np.ndarray, piece_bbox: np.ndarray) -> np.ndarray:
+    def _find_fields_by_coordinates(board_bbox: np.ndarray, pieces_bboxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         '''
-        Finds location of the piece on chess board by their bbox-coordinates got from the model.
+        Finds locations of the pieces on chess board by their bbox-coordinates got from the model.
 
         : param board_bbox: (numpy.ndarray) - bounding box of the chess_board.
-        : param piece_bbox: (numpy.ndarray) - bounding box of the given piece.
+        : param pieces_bboxes: (numpy.ndarray) - bounding boxes of the pieces with shape (N, 4).
 
-        : return: (numpy.ndarray) - coordinates of the piece located on chess board.
+        : return: (Tuple[numpy.ndarray, numpy.ndarray]) - x and y fields of the pieces located on chess board.
         '''
-        piece_center = ((piece_bbox[2]-piece_bbox[0])//2+piece_bbox[0],
-                        (piece_bbox[3]-piece_bbox[1])//2+piece_bbox[1])
-        x_field = int((piece_center[0]-board_bbox[0])/(board_bbox[2]-board_bbox[0])*8)
-        y_field = int((piece_center[1]-board_bbox[1])/(board_bbox[3]-board_bbox[1])*8)
+        pieces_centers = (pieces_bboxes[:, :2] + pieces_bboxes[:, 2:]) / 2
+        fields = np.floor((pieces_centers - board_bbox[:2]) / (board_bbox[2:] - board_bbox[:2]) * 8).astype(np.int64)
 
-        return x_field, y_field
-    
-    def _filled_board_to_fen(self, chess_board: np.ndarray) -> str:
+        return fields[:, 0], fields[:, 1]
+
+    def set_field(self, x: int, y: int, code: int) -> None:
         '''
-        Auxiliary function that converts filled chess_board to FEN positions.
+        Puts a piece code on the field and updates Zobrist hash incrementally.
 
-        : param chess_board: (numpy.ndarray) - filled chess board with pieces.
-        
-        : return: (str) - FEN positions for black and white. 
+        : param x: (int) - field column in FEN order (0 is file "a" for white).
+        : param y: (int) - field row in FEN order (0 is rank 8).
+        : param code: (int) - piece code from PIECES_CODES or 0 to clear the field.
+
+        : return: (None) - this function doesn't return any value.
         '''
-        res_fen = ""
-        for i in range(8):
-            res_fen += self._chess_row_to_fen_row(chess_board[:][i])
-            if i != 7:
-                res_fen += '/'
-        
-        res_fen = res_fen + f' {self._color} - - 0 30'
-        
-        return res_fen
+        field = y * 8 + x
+        self._hash ^= ZOBRIST_KEYS[int(self._board[y, x]) + 6, field] ^ ZOBRIST_KEYS[code + 6, field]
+        self._board[y, x] = code
+        self._fen = None
 
-    @staticmethod
-    def _chess_row_to_fen_row(chess_row: np.ndarray) -> str:
+    def is_valid(self) -> bool:
         '''
-        Auxiliary function that converts one row on chess board to the part of FEN.
+        Checks whether the position made by detections_to_fen is valid after the repair.
 
-        : param chess_row: (numpy.ndarray) - one chess row with shape (8,).
+        : return: (bool) - True if the position can be analysed by the chess engine.
+        '''
+        return self._is_valid
 
-        : return: (str) - this row as a part of FEN.
+    def get_board(self) -> np.ndarray:
         '''
-        result_row = ""
-        empty_count = 0
-        for i in range(8):
-            if chess_row[i] is not None:
-                if empty_count != 0:
-                    result_row += str(empty_count)
-                    empty_count = 0
-                result_row += chess_row[i]
-            else:
-                empty_count += 1
-                if i == 7:
-                    result_row += str(empty_count)
+        Gets the filled board.
 
-        return result_row
-    
-    def chess_move_to_coordinates(self, move: str) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        : return: (numpy.ndarray) - int8 board with shape (8, 8) in FEN order with codes from PIECES_CODES.
+        '''
+        return self._board
+
+    def get_hash(self) -> int:
+        '''
+        Gets Zobrist hash of the position, so positions can be compared without generating FEN.
+
+        : return: (int) - 64-bit hash of pieces placement and side to move.
+        '''
+        return int(self._hash)
+
+    def get_fen(self) -> str:
+        '''
+        Generates FEN of the filled board on demand.
+        Castling rights are not seen on the screen, so they are inferred from kings and rooks on their home squares.
+
+        : return: (str) - FEN position for chosen color.
+        '''
+        if self._fen is None:
+            rows = [''.join(row) for row in PIECES_SYMBOLS[self._board.astype(np.int64) + 6]]
+            placement = re.sub(r'1+', lambda empty: str(len(empty.group())), '/'.join(rows))
+            board = chess.Board(placement + f' {self._color} KQkq - 0 30')
+            board.castling_rights = board.clean_castling_rights()
+            self._fen = board.fen()
+
+        return self._fen
+
+    def get_board_bbox(self) -> np.ndarray:
+        '''
+        Gets bounding box of the chess board found by detections_to_fen.
+
+        : return: (numpy.ndarray) - board bbox in [x_min, y_min, x_max, y_max] format.
+        '''
+        return self._board_bbox
+
+    def translate(self, offset_x: int, offset_y: int) -> None:
+        '''
+        Shifts all bboxes, e.g. from coordinates of a captured region to the monitor frame.
+
+        : param offset_x: (int) - horizontal shift in pixels.
+        : param offset_y: (int) - vertical shift in pixels.
+
+        : return: (None) - this function does not return any value.
+        '''
+        offset = np.array([offset_x, offset_y, offset_x, offset_y])
+        self._bboxes = self._bboxes + offset
+        if self._board_bbox is not None:
+            self._board_bbox = self._board_bbox + offset
+
+    def chess_move_to_coordinates(self, move: str) -> Tuple[Tuple[int, int], ...]:
         '''
         Convert chess move to screen coordinates.
+        A promotion gets the third click on the chosen piece of the promotion menu.
 
-        : param move: (str) - chess move. Must be in format like "e2e4".
+        : param move: (str) - chess move. Must be in format like "e2e4" or "a7a8q".
 
-        : return: (Tuple[Tuple[int, int], Tuple[int, int]]) - two pairs of coordinates on the screen.
+        : return: (Tuple[Tuple[int, int], ...]) - pairs of coordinates on the screen in the order of clicks.
         '''
         if not is_move_valid(move):
             raise ValueError("Invalid move. Cannot convert to coordinates.")
@@ -135,12 +281,16 @@ class ChessBoard():
             y1_board = 7-y1_board
             y2_board = 7-y2_board
 
-        x1 = self._board_bbox[0] + (2*x1_board+1)/16*(self._board_bbox[2]-self._board_bbox[0])
-        y1 = self._board_bbox[1] + (2*y1_board+1)/16*(self._board_bbox[3]-self._board_bbox[1])
-        x2 = self._board_bbox[0] + (2*x2_board+1)/16*(self._board_bbox[2]-self._board_bbox[0])
-        y2 = self._board_bbox[1] + (2*y2_board+1)/16*(self._board_bbox[3]-self._board_bbox[1])
+        fields = [(x1_board, y1_board), (x2_board, y2_board)]
+        if len(move) == 5:
+            # the menu is opened on the promotion square and goes towards the center of the board
+            direction = 1 if y2_board == 0 else -1
+            fields.append((x2_board, y2_board + direction*self._promotion_order.index(move[4])))
 
-        return ((int(x1), int(y1)), (int(x2), int(y2)))
+        width = self._board_bbox[2]-self._board_bbox[0]
+        height = self._board_bbox[3]-self._board_bbox[1]
+        return tuple((int(self._board_bbox[0] + (2*x+1)/16*width), int(self._board_bbox[1] + (2*y+1)/16*height))
+                     for x, y in fields)
 
 
 def is_move_valid(move: str) -> bool:
@@ -154,10 +304,79 @@ def is_move_valid(move: str) -> bool:
     if type(move) is not str:
         raise TypeError("Got a move which is not string.")
     
-    if len(move) != 4: return False
-    if min(move[0], move[2]) < 'a' or max(move[0], move[2]) > 'h':
-        return False
-    if min(move[1], move[3]) < '1' or max(move[1], move[3]) > '8':
-        return False
-    
-    return True
\ No newline at end of file
+    return re.fullmatch(r'[a-h][1-8][a-h][1-8][qrbn]?', move) is not None
+
+def fen_to_board(fen_position: str) -> np.ndarray:
+    '''
+    Converts the piece placement part of FEN to a chess board array.
+
+    : param fen_position: (str) - FEN position.
+
+    : return: (numpy.ndarray) - chess board with shape (8, 8), pieces letters or None for empty fields.
+    '''
+    chess_board = np.full((8, 8), None)
+    for y, fen_row in enumerate(fen_position.split()[0].split('/')):
+        x = 0
+        for symbol in fen_row:
+            if symbol.isdigit():
+                x += int(symbol)
+            else:
+                chess_board[y][x] = symbol
+                x += 1
+
+    return chess_board
+
+
+
+def detections_to_positions(config: dict,
+                            labels: np.ndarray,
+                            bboxes: np.ndarray,
+                            color: str,
+                            scores: Optional[np.ndarray] = None) -> List[Tuple[str, ChessBoard]]:
+    '''
+    Splits detections between all found chess boards and converts each board to FEN.
+    Every piece is assigned to the smallest board containing its center in one vectorized pass.
+
+    : param config: (dict) - chess board configuration object.
+    : param labels: (numpy.ndarray) - labels received from the model.
+    : param bboxes: (numpy.ndarray) - bboxes received from the model.
+    : param color: (str) - which color user play.
+    : param scores: (Optional[numpy.ndarray]) - scores received from the model.
+
+    : return: (List[Tuple[str, ChessBoard]]) - FEN-positions and filled boards ordered left to right, top to bottom.
+    '''
+    labels = np.asarray(labels)
+    bboxes = np.asarray(bboxes, dtype=np.float32).reshape(-1, 4)
+    scores = np.ones(len(labels), dtype=np.float32) if scores is None else np.asarray(scores)
+    board_label = [int(index) for index, name in config["pieces_indexes"].items() if name == config["board_constant"]][0]
+
+    is_board = labels == board_label
+    boards_indexes = np.flatnonzero(is_board)
+    pieces_indexes = np.flatnonzero(~is_board)
+    if len(boards_indexes) == 0:
+        raise ValueError("No chess board found.")
+    boards_indexes = boards_indexes[np.lexsort((bboxes[boards_indexes, 1], bboxes[boards_indexes, 0]))]
+
+    boards_bboxes = bboxes[boards_indexes]
+    pieces_centers = (bboxes[pieces_indexes, :2] + bboxes[pieces_indexes, 2:]) / 2
+    contains = ((pieces_centers[:, None, 0] >= boards_bboxes[None, :, 0])
+                & (pieces_centers[:, None, 0] < boards_bboxes[None, :, 2])
+                & (pieces_centers[:, None, 1] >= boards_bboxes[None, :, 1])
+                & (pieces_centers[:, None, 1] < boards_bboxes[None, :, 3]))
+    boards_areas = (boards_bboxes[:, 2] - boards_bboxes[:, 0]) * (boards_bboxes[:, 3] - boards_bboxes[:, 1])
+    pieces_boards = np.where(contains, boards_areas[None, :], np.inf).argmin(axis=1)
+    pieces_boards[~contains.any(axis=1)] = -1
+
+    positions = []
+    for i, board_index in enumerate(boards_indexes):
+        indexes = np.concatenate([[board_index], pieces_indexes[pieces_boards == i]])
+        chess_board = ChessBoard(config, labels[indexes], bboxes[indexes], color, scores[indexes])
+        try:
+            positions.append((chess_board.detections_to_fen(), chess_board))
+        except ValueError:
+            continue
+
+    if not positions:
+        raise ValueError("Empty board.")
+
+    return positions
\ No newline at end of file
@@ -1,5 +1,5 @@
 import numpy as np
-from typing import List
+from typing import List, Optional
 from enum import Enum
 
 class DetectionType(str, Enum):
@@ -8,9 +8,13 @@ class DetectionType(str, Enum):
 
     Possible values:
     - DetectionType.MMDETECTION: "mmdetection"
+    - DetectionType.SQUARE_CLASSIFIER: "square_classifier"
+    - DetectionType.ONNX: "onnx"
     '''
 
     MMDETECTION = "mmdetection"
+    SQUARE_CLASSIFIER = "square_classifier"
+    ONNX = "onnx"
 
     def __eq__(self, other):
         return self.value == other
@@ -54,13 +58,88 @@ def intersection_over_union(bbox1: List[float], bbox2: List[float]) -> float:
     return iou
 
 
-def filter_detections(raw_result: dict, iou_threshold: float, score_threshold: float) -> dict:
+def iou_matrix(bboxes1: np.ndarray, bboxes2: np.ndarray) -> np.ndarray:
+    '''
+    Calculates pairwise Intersection Over Union (IOU) for two sets of bounding boxes.
+    Bounding boxes must be specified as [x_min, y_min, x_max, y_max].
+
+    : param bboxes1: (numpy.ndarray) - first set of bounding boxes with shape (N, 4).
+    : param bboxes2: (numpy.ndarray) - second set of bounding boxes with shape (M, 4).
+
+    : return: (numpy.ndarray) - IOU values with shape (N, M).
+    '''
+    bboxes1 = np.asarray(bboxes1, dtype=np.float32).reshape(-1, 4)
+    bboxes2 = np.asarray(bboxes2, dtype=np.float32).reshape(-1, 4)
+
+    x_left = np.maximum(bboxes1[:, None, 0], bboxes2[None, :, 0])
+    y_top = np.maximum(bboxes1[:, None, 1], bboxes2[None, :, 1])
+    x_right = np.minimum(bboxes1[:, None, 2], bboxes2[None, :, 2])
+    y_bottom = np.minimum(bboxes1[:, None, 3], bboxes2[None, :, 3])
+    intersection_area = np.clip(x_right - x_left, 0, None) * np.clip(y_bottom - y_top, 0, None)
+
+    area_bboxes1 = (bboxes1[:, 2] - bboxes1[:, 0]) * (bboxes1[:, 3] - bboxes1[:, 1])
+    area_bboxes2 = (bboxes2[:, 2] - bboxes2[:, 0]) * (bboxes2[:, 3] - bboxes2[:, 1])
+    union_area = area_bboxes1[:, None] + area_bboxes2[None, :] - intersection_area
+
+    return np.divide(intersection_area, union_area, out=np.zeros_like(intersection_area), where=union_area > 0)
+
+
+def non_max_suppression(bboxes: np.ndarray,
+                        scores: np.ndarray,
+                        labels: np.ndarray,
+                        iou_threshold: float,
+                        score_threshold: float,
+                        class_agnostic: bool = True,
+                        board_label: Optional[int] = None) -> np.ndarray:
+    '''
+    Greedy non-maximum suppression over a precomputed IOU matrix.
+    Boxes below the score threshold are dropped before any pair is compared.
+
+    : param bboxes: (numpy.ndarray) - bounding boxes with shape (N, 4).
+    : param scores: (numpy.ndarray) - scores with shape (N,).
+    : param labels: (numpy.ndarray) - class labels with shape (N,).
+    : param iou_threshold: (float) - max value of iou that is allowed between kept boxes.
+    : param score_threshold: (float) - min score value that is allowed in predictions.
+    : param class_agnostic: (bool) - whether boxes of different classes suppress each other.
+    : param board_label: (Optional[int]) - label of the chess board, which never suppresses pieces and vice versa.
+
+    : return: (numpy.ndarray) - indexes of kept boxes in the input order.
+    '''
+    candidates = np.flatnonzero(scores >= score_threshold)
+    if len(candidates) == 0:
+        return candidates
+    candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+
+    # boxes can suppress each other only inside one group
+    candidate_labels = labels[candidates]
+    if class_agnostic:
+        groups = candidate_labels == board_label if board_label is not None else np.zeros(len(candidates), dtype=np.bool_)
+    else:
+        groups = candidate_labels
+    overlaps = iou_matrix(bboxes[candidates], bboxes[candidates]) > iou_threshold
+    overlaps &= groups[:, None] == groups[None, :]
+
+    keep = np.ones(len(candidates), dtype=np.bool_)
+    for i in range(len(candidates)):
+        if keep[i]:
+            keep[i+1:] &= ~overlaps[i, i+1:]
+
+    return np.sort(candidates[keep])
+
+
+def filter_detections(raw_result: dict,
+                      iou_threshold: float,
+                      score_threshold: float,
+                      class_agnostic: bool = True,
+                      board_label: Optional[int] = None) -> dict:
     '''
     Receives detection result via DetInferencer and discards extra bboxes.
-    
+
     : param raw_result: (dict) - raw predictions got from the model.
     : param iou_threshold: (float) - max value of iou that is allowed in predictions.
     : param score_threshold: (float) - min score value that is allowed in predictions.
+    : param class_agnostic: (bool) - whether boxes of different classes suppress each other.
+    : param board_label: (Optional[int]) - label of the chess board, which never suppresses pieces.
 
     : return: (dict) - selected predictions in the same format as input values.
     '''
@@ -68,32 +147,16 @@ def filter_detections(raw_result: dict, iou_threshold: float, score_threshold: f
     if not all([key in raw_result.keys() for key in ['predictions', 'visualization']]):
         raise ValueError("Incorrect format. Must have keys 'predictions' and 'visualization'")
 
-    num_predictions = len(raw_result['predictions'][0]['scores'])
-    mask = np.full(num_predictions, True, dtype=np.bool_)
-    bboxes = np.array(raw_result['predictions'][0]['bboxes'])
-    scores = np.array(raw_result['predictions'][0]['scores'])
+    bboxes = np.array(raw_result['predictions'][0]['bboxes'], dtype=np.float32).reshape(-1, 4)
+    scores = np.array(raw_result['predictions'][0]['scores'], dtype=np.float32)
     labels = np.array(raw_result['predictions'][0]['labels'])
 
-    # filter by iou
-    for i in range(num_predictions):
-        for j in range(i+1, num_predictions):
-            bbox1 = bboxes[i]
-            bbox2 = bboxes[j]
-            if intersection_over_union(bbox1, bbox2) > iou_threshold:
-                if scores[i] < scores[j]:
-                    scores[i] = 0.0
-                else:
-                    scores[j] = 0.0
-            
-    # filter by scores
-    for ind, score in enumerate(scores):
-        if score < score_threshold:
-            mask[ind] = False
+    keep = non_max_suppression(bboxes, scores, labels, iou_threshold, score_threshold, class_agnostic, board_label)
 
     # apply mask
     result = raw_result.copy()
-    result['predictions'][0]['labels'] = labels[mask]
-    result['predictions'][0]['scores'] = scores[mask]
-    result['predictions'][0]['bboxes'] = bboxes[mask]
+    result['predictions'][0]['labels'] = labels[keep]
+    result['predictions'][0]['scores'] = scores[keep]
+    result['predictions'][0]['bboxes'] = bboxes[keep]
 
-    return result
\ No newline at end of file
+    return result
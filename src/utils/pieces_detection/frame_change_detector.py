@@ -0,0 +1,112 @@
+import cv2
+import numpy as np
+from typing import List, Optional
+
+class FrameChangeDetector():
+    '''Class for cheap detection of changes on the chess board between frames.'''
+
+    def __init__(self, config: dict) -> None:
+        '''
+        Initializes an instance of FrameChangeDetector.
+
+        : param config: (dict) - change detection configuration object.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self._config = config
+        self._enabled = config["enabled"]
+        self._cell_size = config["cell_size"]
+        self._square_diff_threshold = config["square_diff_threshold"]
+        self._max_skipped_frames = config["max_skipped_frames"]
+        self._previous_thumbnail = None
+        self._skipped_frames = 0
+        self.hits = 0
+        self.misses = 0
+
+    def reset(self) -> None:
+        '''
+        Forgets the last frame, so the next one is always reported as changed.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self._previous_thumbnail = None
+        self._skipped_frames = 0
+
+    def has_changed(self, image: np.ndarray, boards_bboxes: Optional[List[np.ndarray]] = None) -> bool:
+        '''
+        Compares the boards regions of the given frame with the last detected one.
+        Every region is downsampled to a grayscale 8x8 grid of cells and every
+        square is compared by its mean absolute difference.
+
+        : param image: (numpy.ndarray) - BGR frame.
+        : param boards_bboxes: (Optional[List[numpy.ndarray]]) - last known boards bboxes, the whole frame is used if None.
+
+        : return: (bool) - whether detection has to be run on this frame.
+        '''
+        if not self._enabled:
+            return True
+
+        if boards_bboxes is None:
+            boards_bboxes = [None]
+        thumbnail = np.stack([self._make_thumbnail(image, board_bbox) for board_bbox in boards_bboxes])
+
+        changed = (self._previous_thumbnail is None
+                   or self._previous_thumbnail.shape != thumbnail.shape
+                   or self._skipped_frames >= self._max_skipped_frames
+                   or self._squares_difference(self._previous_thumbnail, thumbnail).max() > self._square_diff_threshold)
+
+        if changed:
+            # the reference frame is the last detected one, so slow changes still add up
+            self._previous_thumbnail = thumbnail
+            self.misses += 1
+            self._skipped_frames = 0
+        else:
+            self.hits += 1
+            self._skipped_frames += 1
+
+        return bool(changed)
+
+    def _make_thumbnail(self, image: np.ndarray, board_bbox: Optional[np.ndarray]) -> np.ndarray:
+        '''
+        Crops the board region and downsamples it to (8*cell_size, 8*cell_size) grayscale image.
+
+        : param image: (numpy.ndarray) - BGR frame.
+        : param board_bbox: (Optional[numpy.ndarray]) - board bbox in [x_min, y_min, x_max, y_max] format.
+
+        : return: (numpy.ndarray) - grayscale thumbnail.
+        '''
+        if board_bbox is not None:
+            height, width = image.shape[:2]
+            x_min, y_min = max(int(board_bbox[0]), 0), max(int(board_bbox[1]), 0)
+            x_max, y_max = min(int(board_bbox[2]), width), min(int(board_bbox[3]), height)
+            if x_max > x_min and y_max > y_min:
+                image = image[y_min:y_max, x_min:x_max]
+
+        side = 8 * self._cell_size
+        thumbnail = cv2.resize(image, (side, side), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(thumbnail, cv2.COLOR_BGR2GRAY)
+
+    def _squares_difference(self, thumbnail1: np.ndarray, thumbnail2: np.ndarray) -> np.ndarray:
+        '''
+        Calculates mean absolute difference for each of 64 squares of every board.
+
+        : param thumbnail1: (numpy.ndarray) - first thumbnail.
+        : param thumbnail2: (numpy.ndarray) - second thumbnail.
+
+        : return: (numpy.ndarray) - differences with shape (num_boards, 8, 8).
+        '''
+        difference = np.abs(thumbnail1.astype(np.int16) - thumbnail2.astype(np.int16))
+        return difference.reshape(-1, 8, self._cell_size, 8, self._cell_size).mean(axis=(2, 4))
+
+    def get_stats(self) -> dict:
+        '''
+        Gets statistics of the gate.
+
+        : return: (dict) - number of skipped (hits) and detected (misses) frames and hit rate.
+        '''
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
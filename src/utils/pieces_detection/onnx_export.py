@@ -0,0 +1,69 @@
+import argparse
+import glob
+import os
+import torch
+from mmdet.apis import init_detector
+
+
+class RTMDetExportWrapper(torch.nn.Module):
+    '''
+    Wraps RTMDet to output raw head predictions of all levels flattened in one tensor.
+    Decoding and NMS are left to PiecesDetectionONNX.
+    '''
+
+    def __init__(self, model: torch.nn.Module) -> None:
+        super().__init__()
+        self._model = model
+
+    def forward(self, image: torch.Tensor):
+        features = self._model.extract_feat(image)
+        cls_scores, bbox_preds = self._model.bbox_head(features)
+        batch_size = image.shape[0]
+        scores = torch.cat([score.permute(0, 2, 3, 1).reshape(batch_size, -1, score.shape[1]) for score in cls_scores], dim=1)
+        distances = torch.cat([bbox.permute(0, 2, 3, 1).reshape(batch_size, -1, 4) for bbox in bbox_preds], dim=1)
+        return scores.sigmoid(), distances
+
+
+def export_onnx(parameters_path: str, checkpoint_path: str, output_path: str, input_size: int, opset: int) -> None:
+    """
+    Exports RTMDet model with trained weights to ONNX.
+
+    : param parameters_path: (str) - path to mmdetection model config.
+    : param checkpoint_path: (str) - path (or glob pattern) to the checkpoint.
+    : param output_path: (str) - path to save ONNX model.
+    : param input_size: (int) - side of the square model input.
+    : param opset: (int) - ONNX opset version.
+
+    : return: (None) - this function does not return any value.
+    """
+    checkpoint = glob.glob(checkpoint_path)[0]
+    model = init_detector(parameters_path, checkpoint, device='cpu')
+    wrapper = RTMDetExportWrapper(model).eval()
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    dummy_input = torch.zeros(1, 3, input_size, input_size)
+    with torch.no_grad():
+        torch.onnx.export(wrapper, dummy_input, output_path,
+                          input_names=['image'],
+                          output_names=['scores', 'distances'],
+                          opset_version=opset)
+    print(f"Model exported to {output_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Exports pieces detection RTMDet model to ONNX')
+    parser.add_argument('--parameters', type=str, default='../assets/models/pieces_detection/mmdetection/rtmdet_chess_net.py',
+                        help='path to mmdetection model config')
+    parser.add_argument('--checkpoint', type=str, default='../assets/models/pieces_detection/mmdetection/best_coco_bbox_mAP.pth',
+                        help='path to model checkpoint')
+    parser.add_argument('--output', type=str, default='../assets/models/pieces_detection/onnx/rtmdet_chess_net.onnx',
+                        help='path to output ONNX model')
+    parser.add_argument('--input_size', type=int, default=640, help='side of the square model input')
+    parser.add_argument('--opset', type=int, default=17, help='ONNX opset version')
+    args = parser.parse_args()
+
+    export_onnx(args.parameters, args.checkpoint, args.output, args.input_size, args.opset)
+
+
+if __name__ == '__main__':
+    main()
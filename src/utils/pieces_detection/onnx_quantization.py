@@ -0,0 +1,117 @@
+import argparse
+import json
+import os
+import cv2
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from onnxruntime.quantization import (CalibrationDataReader, QuantFormat, QuantType,
+                                      quantize_dynamic, quantize_static)
+
+from pieces_detection.onnx.pieces_detection_onnx import preprocess_image
+from utils.common_utils import load_config
+
+
+def load_coco_dataset(annotations_path: str,
+                      images_dir: str,
+                      board_config: dict) -> List[Tuple[str, np.ndarray, np.ndarray]]:
+    """
+    Loads COCO-format dataset produced by utils/dataset/voc2coco.py.
+    Category ids are mapped to model labels by category names.
+
+    : param annotations_path: (str) - path to COCO json.
+    : param images_dir: (str) - folder with dataset images.
+    : param board_config: (dict) - chess board configuration object.
+
+    : return: (List[Tuple[str, numpy.ndarray, numpy.ndarray]]) - image paths with ground truth labels and bboxes.
+    """
+    with open(annotations_path, 'r') as f:
+        coco = json.load(f)
+
+    name_to_label = {name: int(index) for index, name in board_config["pieces_indexes"].items()}
+    category_to_label = {category['id']: name_to_label[category['name']] for category in coco['categories']}
+
+    annotations: Dict[int, list] = {image['id']: [] for image in coco['images']}
+    for annotation in coco['annotations']:
+        annotations[annotation['image_id']].append(annotation)
+
+    dataset = []
+    for image in coco['images']:
+        image_annotations = annotations[image['id']]
+        labels = np.array([category_to_label[annotation['category_id']] for annotation in image_annotations], dtype=np.int64)
+        bboxes = np.array([[x, y, x + width, y + height] for x, y, width, height in
+                           (annotation['bbox'] for annotation in image_annotations)], dtype=np.float32).reshape(-1, 4)
+        dataset.append((os.path.join(images_dir, image['file_name']), labels, bboxes))
+
+    return dataset
+
+
+class CocoCalibrationDataReader(CalibrationDataReader):
+    '''Calibration data reader feeding preprocessed dataset images to ONNX Runtime quantization.'''
+
+    def __init__(self, image_paths: List[str], config: dict, input_name: str) -> None:
+        '''
+        Initializes an instance of CocoCalibrationDataReader.
+
+        : param image_paths: (List[str]) - calibration images.
+        : param config: (dict) - ONNX model configuration object.
+        : param input_name: (str) - name of the model input.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self._image_paths = iter(image_paths)
+        self._config = config
+        self._input_name = input_name
+
+    def get_next(self) -> Optional[dict]:
+        image_path = next(self._image_paths, None)
+        if image_path is None:
+            return None
+        model_input, _ = preprocess_image(cv2.imread(image_path), self._config)
+        return {self._input_name: model_input}
+
+
+def quantize_model(config: dict, image_paths: List[str], mode: str) -> None:
+    """
+    Quantizes the float ONNX model to INT8 and saves it to config int8_model_path.
+
+    : param config: (dict) - ONNX model configuration object.
+    : param image_paths: (List[str]) - calibration images, used only in static mode.
+    : param mode: (str) - "static" for calibrated post-training quantization or "dynamic" for weights only.
+
+    : return: (None) - this function does not return any value.
+    """
+    if mode == "dynamic":
+        quantize_dynamic(config["model_path"], config["int8_model_path"], weight_type=QuantType.QInt8)
+    else:
+        reader = CocoCalibrationDataReader(image_paths, config, input_name='image')
+        quantize_static(config["model_path"], config["int8_model_path"], reader,
+                        quant_format=QuantFormat.QDQ,
+                        per_channel=True,
+                        activation_type=QuantType.QUInt8,
+                        weight_type=QuantType.QInt8)
+    print(f"Quantized model saved to {config['int8_model_path']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Quantizes ONNX pieces detection model to INT8')
+    parser.add_argument('--config', type=str, default='../assets/configs/pieces_detection/onnx/config.json',
+                        help='path to ONNX pieces detection config')
+    parser.add_argument('--annotations', type=str, default=None, help='path to COCO json used for calibration')
+    parser.add_argument('--images', type=str, default=None, help='folder with calibration images')
+    parser.add_argument('--num_images', type=int, default=100, help='max number of calibration images')
+    parser.add_argument('--mode', type=str, default='static', choices=['static', 'dynamic'], help='quantization mode')
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    image_paths = []
+    if args.mode == 'static':
+        if args.annotations is None or args.images is None:
+            raise ValueError("Static quantization needs --annotations and --images for calibration.")
+        board_config = load_config(config["chess_board_config"])
+        image_paths = [path for path, _, _ in load_coco_dataset(args.annotations, args.images, board_config)][:args.num_images]
+
+    quantize_model(config, image_paths, args.mode)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+import threading
+import time
+from typing import Any, Callable, Optional
+
+class LatestQueue():
+    '''Bounded queue of size one with latest-wins semantics: a new item replaces the unread one.'''
+
+    def __init__(self) -> None:
+        '''
+        Initializes an instance of LatestQueue.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self._condition = threading.Condition()
+        self._item = None
+        self._latest = None
+        self._has_item = False
+        self.version = 0
+        self.dropped = 0
+
+    def put(self, item: Any) -> None:
+        '''
+        Puts an item to the queue, dropping the unread one.
+
+        : param item: (Any) - item to put.
+
+        : return: (None) - this function does not return any value.
+        '''
+        with self._condition:
+            if self._has_item:
+                self.dropped += 1
+            self._item = item
+            self._latest = item
+            self._has_item = True
+            self.version += 1
+            self._condition.notify_all()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        '''
+        Takes the item from the queue, waiting for it at most timeout seconds.
+
+        : param timeout: (Optional[float]) - max waiting time in seconds, wait forever if None.
+
+        : return: (Optional[Any]) - the latest item or None if nothing came in time.
+        '''
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._has_item, timeout):
+                return None
+            self._has_item = False
+            item, self._item = self._item, None
+            return item
+
+    def peek(self) -> Optional[Any]:
+        '''
+        Gets the latest item put to the queue without taking it.
+
+        : return: (Optional[Any]) - the latest item or None if nothing was put yet.
+        '''
+        with self._condition:
+            return self._latest
+
+    def clear(self) -> None:
+        '''
+        Drops the unread item and forgets the latest one.
+
+        : return: (None) - this function does not return any value.
+        '''
+        with self._condition:
+            self._item = None
+            self._latest = None
+            self._has_item = False
+            self.version += 1
+
+
+class PipelineStage(threading.Thread):
+    '''Worker thread running one stage of the pipeline.'''
+
+    def __init__(self,
+                 name: str,
+                 function: Callable[[Any], Optional[Any]],
+                 stop_event: threading.Event,
+                 input_queue: Optional[LatestQueue] = None,
+                 output_queue: Optional[LatestQueue] = None,
+                 poll_interval: float = 0.1,
+                 initializer: Optional[Callable[[], None]] = None) -> None:
+        '''
+        Initializes an instance of PipelineStage.
+
+        : param name: (str) - name of the stage.
+        : param function: (Callable) - processes one input item, returns an output item or None to publish nothing.
+        Stages without input queue call it with None in a loop.
+        : param stop_event: (threading.Event) - event stopping all stages.
+        : param input_queue: (Optional[LatestQueue]) - queue to take items from.
+        : param output_queue: (Optional[LatestQueue]) - queue to put results to.
+        : param poll_interval: (float) - max time to wait for an input item before checking the stop event.
+        : param initializer: (Optional[Callable]) - called once on the stage thread before processing, e.g. to pin it to cores.
+
+        : return: (None) - this function does not return any value.
+        '''
+        super().__init__(name=name, daemon=True)
+        self._function = function
+        self._stop_event = stop_event
+        self._input_queue = input_queue
+        self._output_queue = output_queue
+        self._poll_interval = poll_interval
+        self._initializer = initializer
+        self.processed = 0
+        self.busy_time = 0.0
+
+    def run(self) -> None:
+        '''
+        Processes items until the stop event is set.
+
+        : return: (None) - this function does not return any value.
+        '''
+        if self._initializer is not None:
+            self._initializer()
+        while not self._stop_event.is_set():
+            item = None
+            if self._input_queue is not None:
+                item = self._input_queue.get(timeout=self._poll_interval)
+                if item is None:
+                    continue
+
+            start_time = time.perf_counter()
+            try:
+                result = self._function(item)
+            except Exception as e:
+                print(f"An unknown error occurred in {self.name} stage. Error message:\n{str(e)}")
+                continue
+            self.busy_time += time.perf_counter() - start_time
+            self.processed += 1
+
+            if result is not None and self._output_queue is not None:
+                self._output_queue.put(result)
@@ -0,0 +1,112 @@
+import os
+import sys
+from typing import Dict, List, Optional
+
+# environment variables read by OpenMP, MKL and OpenBLAS thread pools when torch or numpy start them
+THREADS_ENVIRONMENT_VARIABLES = ["OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"]
+
+class ResourcePlanner():
+    '''
+    Splits CPU cores budget between program components, so they do not oversubscribe the CPU.
+    Reserved cores are left to capture, interface and the main thread, the rest is shared by configured shares.
+    '''
+
+    def __init__(self, config: dict) -> None:
+        '''
+        Initializes an instance of ResourcePlanner.
+
+        : param config: (dict) - CPU budget configuration object.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self._config = config
+        self._threads = {}
+        self._cores = {}
+        if not config["enabled"]:
+            return
+
+        total_cores = config["total_cores"] or os.cpu_count()
+        reserved_cores = min(config["reserved_cores"], total_cores - 1)
+        available_cores = total_cores - reserved_cores
+        shares = config["shares"]
+        total_share = sum(shares.values())
+
+        # every component gets at least one thread, the rest of the cores goes to the largest shares
+        threads = {name: max(int(available_cores * share / total_share), 1) for name, share in shares.items()}
+        for name in sorted(shares, key=shares.get, reverse=True):
+            if sum(threads.values()) >= available_cores:
+                break
+            threads[name] += 1
+        self._threads = threads
+
+        # cores are given out in order after the reserved ones, wrapping around if minimal shares exceed them
+        self._cores["reserved"] = list(range(reserved_cores))
+        next_core = 0
+        for name, num_threads in threads.items():
+            self._cores[name] = [reserved_cores + (next_core + i) % available_cores for i in range(num_threads)]
+            next_core += num_threads
+
+    def is_enabled(self) -> bool:
+        '''
+        Checks whether the budget is applied.
+
+        : return: (bool) - True if the budget is enabled in config.
+        '''
+        return self._config["enabled"]
+
+    def get_threads(self, name: str) -> Optional[int]:
+        '''
+        Gets number of threads planned for the component.
+
+        : param name: (str) - component name from config shares.
+
+        : return: (Optional[int]) - number of threads or None if the budget is disabled.
+        '''
+        return self._threads.get(name)
+
+    def get_plan(self) -> Dict[str, List[int]]:
+        '''
+        Gets cores planned for every component.
+
+        : return: (Dict[str, List[int]]) - cores ids by component name.
+        '''
+        return self._cores
+
+    def limit_torch_threads(self) -> None:
+        '''
+        Limits torch intra-op and inter-op thread pools to the detection share.
+        Speech recognition runs in the same torch pools, while the detection waits for the user.
+        Environment variables cover torch imported later, already imported torch is configured directly.
+
+        : return: (None) - this function does not return any value.
+        '''
+        num_threads = self.get_threads("detection")
+        if num_threads is None:
+            return
+        for variable in THREADS_ENVIRONMENT_VARIABLES:
+            os.environ[variable] = str(num_threads)
+
+        if "torch" in sys.modules:
+            torch = sys.modules["torch"]
+            torch.set_num_threads(num_threads)
+            try:
+                torch.set_interop_threads(self._config["interop_threads"])
+            except RuntimeError:
+                # inter-op pool can be sized only before it is started
+                pass
+
+    def pin_current_thread(self, name: str) -> None:
+        '''
+        Pins the calling thread to the cores of the component if affinity is enabled.
+        Processes started by the thread, e.g. the chess engine, inherit the affinity.
+
+        : param name: (str) - component name from config shares or "reserved".
+
+        : return: (None) - this function does not return any value.
+        '''
+        if not self._config["enabled"] or not self._config["set_affinity"] or not hasattr(os, "sched_setaffinity"):
+            return
+        cores = self._cores.get(name)
+        if cores:
+            # on Linux pid 0 is the calling thread
+            os.sched_setaffinity(0, cores)
@@ -0,0 +1,137 @@
+import argparse
+import glob
+import os
+import time
+import numpy as np
+import torchaudio
+from typing import List, Tuple
+
+from speech_recognizer.keyword_spotting.asr_keyword_spotting import (WORDS, compute_log_mel, split_words,
+                                                                     word_features)
+from utils.common_utils import load_config
+
+
+def load_samples(samples_dir: str, config: dict) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Loads recorded words and computes their features.
+    Every word of the vocabulary has its own folder of .wav recordings, e.g. samples/knight/1.wav.
+
+    : param samples_dir: (str) - folder with the word folders.
+    : param config: (dict) - keyword spotting configuration object.
+
+    : return: (Tuple[numpy.ndarray, numpy.ndarray]) - features with shape (N, n_mels*word_frames) and their words.
+    """
+    mel_transform = torchaudio.transforms.MelSpectrogram(sample_rate=config["sample_rate"], n_fft=config["n_fft"],
+                                                         hop_length=config["hop_length"], n_mels=config["n_mels"])
+    features, labels = [], []
+    for word_dir in sorted(glob.glob(os.path.join(samples_dir, '*', ''))):
+        word = os.path.basename(os.path.dirname(word_dir))
+        if word not in WORDS:
+            print(f"Skipping {word}: it is not in the vocabulary.")
+            continue
+        for path in sorted(glob.glob(os.path.join(word_dir, '*.wav'))):
+            waveform, sample_rate = torchaudio.load(path)
+            if sample_rate != config["sample_rate"]:
+                waveform = torchaudio.functional.resample(waveform, sample_rate, config["sample_rate"])
+            log_mel = compute_log_mel(waveform.mean(dim=0).numpy(), mel_transform)
+            segments = split_words(log_mel, config)
+            if not segments:
+                print(f"Skipping {path}: no speech is found.")
+                continue
+            # the recording holds one word, so everything from the first to the last voiced frame belongs to it
+            features.append(word_features(log_mel[:, segments[0][0]:segments[-1][1]], config["word_frames"]))
+            labels.append(word)
+
+    if not features:
+        raise ValueError(f"No samples found in {samples_dir}.")
+    return np.stack(features), np.array(labels)
+
+
+def split_dataset(labels: np.ndarray, eval_fraction: float, seed: int) -> Tuple[List[int], List[int]]:
+    """
+    Splits samples of every word into train and eval parts.
+
+    : param labels: (numpy.ndarray) - words of the samples.
+    : param eval_fraction: (float) - fraction of samples of every word left for evaluation.
+    : param seed: (int) - random seed of the split.
+
+    : return: (Tuple[List[int], List[int]]) - train and eval sample indexes.
+    """
+    rng = np.random.default_rng(seed)
+    train, evaluation = [], []
+    for word in np.unique(labels):
+        indexes = rng.permutation(np.flatnonzero(labels == word))
+        num_eval = int(len(indexes) * eval_fraction)
+        evaluation += indexes[:num_eval].tolist()
+        train += indexes[num_eval:].tolist()
+    return train, evaluation
+
+
+def evaluate(templates: np.ndarray, template_labels: np.ndarray, features: np.ndarray, labels: np.ndarray,
+             min_confidence: float) -> None:
+    """
+    Prints accuracy, fallback rate and time per word of the nearest-template classification.
+
+    : param templates: (numpy.ndarray) - template features.
+    : param template_labels: (numpy.ndarray) - words of the templates.
+    : param features: (numpy.ndarray) - features of the eval samples.
+    : param labels: (numpy.ndarray) - words of the eval samples.
+    : param min_confidence: (float) - min similarity to accept the word without the fallback.
+
+    : return: (None) - this function does not return any value.
+    """
+    start_time = time.perf_counter()
+    similarity = features @ templates.T
+    best = similarity.argmax(axis=1)
+    predictions = template_labels[best]
+    confident = similarity[np.arange(len(features)), best] >= min_confidence
+    elapsed = (time.perf_counter() - start_time) * 1000 / len(features)
+
+    accuracy = np.mean(predictions == labels)
+    confident_accuracy = np.mean(predictions[confident] == labels[confident]) if confident.any() else float('nan')
+    print(f"Accuracy: {accuracy:.3f}, accuracy of confident words: {confident_accuracy:.3f}, "
+          f"fallback rate: {1 - confident.mean():.3f}, {elapsed:.2f} ms/word over {len(features)} words")
+    for word in np.unique(labels):
+        mask = labels == word
+        print(f"  {word}: {np.mean(predictions[mask] == word):.3f} over {mask.sum()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Makes keyword spotting templates from recorded words and evaluates them')
+    parser.add_argument('--config', type=str, default='../assets/configs/speech_recognition/keyword_spotting/config.json',
+                        help='path to keyword spotting config')
+    parser.add_argument('--samples', type=str, required=True, help='folder with a folder of .wav recordings for every word')
+    parser.add_argument('--eval_fraction', type=float, default=0.2, help='fraction of samples of every word for evaluation')
+    parser.add_argument('--seed', type=int, default=0, help='random seed of the split and templates selection')
+    parser.add_argument('--eval_only', action='store_true', help='evaluate the saved templates on all samples')
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    features, labels = load_samples(args.samples, config)
+
+    if args.eval_only:
+        templates = np.load(config["templates_path"])
+        evaluate(templates["features"], templates["labels"], features, labels, config["min_confidence"])
+        return
+
+    train, evaluation = split_dataset(labels, args.eval_fraction, args.seed)
+    # a random subset of every word keeps the templates small, so the classification stays fast
+    rng = np.random.default_rng(args.seed)
+    keep = []
+    for word in np.unique(labels[train]):
+        indexes = [index for index in train if labels[index] == word]
+        keep += rng.permutation(indexes)[:config["max_templates_per_class"]].tolist()
+
+    missing = sorted(set(WORDS) - set(labels[keep]))
+    if missing:
+        print(f"No samples of the words: {', '.join(missing)}. They cannot be spotted.")
+    if evaluation:
+        evaluate(features[keep], labels[keep], features[evaluation], labels[evaluation], config["min_confidence"])
+
+    os.makedirs(os.path.dirname(config["templates_path"]), exist_ok=True)
+    np.savez(config["templates_path"], features=features[keep], labels=labels[keep])
+    print(f"Templates of {len(keep)} samples saved to {config['templates_path']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,38 +1,225 @@
+import threading
+import time
+from typing import Any, Optional
+import numpy as np
 import pyaudio
-import wave
-
-def record_audio(filename: str, duration: int, sample_rate: int, channels: int) -> None:
-    """
-    Records and saves audio file from microphone.
-
-    : param filename: (str) - filename to save.
-    : param duration: (int) - duration of a single audio.
-    : param sample_rate: (int) - sample rate of an audio file.
-    : param channels: (int) - number of channels to write.
-    
-    : return: (None) - this function does not return any value.
-    """
-    p = pyaudio.PyAudio()
-    stream = p.open(format=pyaudio.paInt16,
-                    channels=channels,
-                    rate=sample_rate,
-                    input=True,
-                    frames_per_buffer=1024)
-    frames = []
-    
-    print("Recording...")
-    for _ in range(0, int(sample_rate / 1024 * duration)):
-        data = stream.read(1024)
-        frames.append(data)
-    print("Finished recording.")
-    
-    stream.stop_stream()
-    stream.close()
-    p.terminate()
-    
-    wf = wave.open(filename, 'wb')
-    wf.setnchannels(channels)
-    wf.setsampwidth(p.get_sample_size(pyaudio.paInt16))
-    wf.setframerate(sample_rate)
-    wf.writeframes(b''.join(frames))
-    wf.close()
\ No newline at end of file
+
+class AudioStream():
+    '''
+    Long-lived microphone stream filling a ring buffer of mono float32 samples.
+    The device is opened once, utterances are read from the buffer without disk I/O.
+    '''
+
+    def __init__(self, sample_rate: int, channels: int, buffer_seconds: float, frames_per_buffer: int) -> None:
+        '''
+        Initializes an instance of AudioStream and starts the capture.
+
+        : param sample_rate: (int) - requested sample rate, the device default one is used if it is not supported.
+        : param channels: (int) - number of channels to capture, they are mixed down to mono.
+        : param buffer_seconds: (float) - length of the ring buffer in seconds.
+        : param frames_per_buffer: (int) - number of frames passed to the callback at once.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self._channels = channels
+        self._condition = threading.Condition()
+        self._audio = pyaudio.PyAudio()
+        try:
+            self._stream = self._open(sample_rate, frames_per_buffer)
+            self.sample_rate = sample_rate
+        except (OSError, ValueError):
+            # the device cannot capture at the requested rate, the caller resamples
+            self.sample_rate = int(self._audio.get_default_input_device_info()["defaultSampleRate"])
+            self._stream = self._open(self.sample_rate, frames_per_buffer)
+
+        self._buffer = np.zeros(int(buffer_seconds * self.sample_rate), dtype=np.float32)
+        # total number of samples captured since the start, the write position is its remainder
+        self._written = 0
+        self._stream.start_stream()
+
+    def _open(self, sample_rate: int, frames_per_buffer: int) -> Any:
+        '''
+        Opens the input stream in callback mode.
+
+        : param sample_rate: (int) - sample rate of the stream.
+        : param frames_per_buffer: (int) - number of frames passed to the callback at once.
+
+        : return: (Any) - opened PyAudio stream, not started yet.
+        '''
+        return self._audio.open(format=pyaudio.paInt16,
+                                channels=self._channels,
+                                rate=sample_rate,
+                                input=True,
+                                frames_per_buffer=frames_per_buffer,
+                                stream_callback=self._callback,
+                                start=False)
+
+    def _callback(self, data: bytes, frame_count: int, time_info: dict, status: int) -> tuple:
+        '''
+        Converts captured frames to mono float32 and writes them to the ring buffer.
+
+        : return: (tuple) - no output data and the flag to continue the capture.
+        '''
+        samples = np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
+        if self._channels > 1:
+            samples = samples.reshape(-1, self._channels).mean(axis=1)
+
+        size = len(self._buffer)
+        samples = samples[-size:]
+        with self._condition:
+            start = self._written % size
+            end = start + len(samples)
+            if end <= size:
+                self._buffer[start:end] = samples
+            else:
+                self._buffer[start:] = samples[:size - start]
+                self._buffer[:end - size] = samples[size - start:]
+            self._written += len(samples)
+            self._condition.notify_all()
+        return None, pyaudio.paContinue
+
+    def get_position(self) -> int:
+        '''
+        Gets the number of samples captured since the start.
+
+        : return: (int) - position of the next captured sample.
+        '''
+        with self._condition:
+            return self._written
+
+    def wait(self, position: int, timeout: float) -> bool:
+        '''
+        Waits until the sample at the position is captured.
+
+        : param position: (int) - position of the sample.
+        : param timeout: (float) - max waiting time in seconds.
+
+        : return: (bool) - True if the sample is captured.
+        '''
+        with self._condition:
+            return self._condition.wait_for(lambda: self._written > position, timeout)
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        '''
+        Copies captured samples from the ring buffer.
+        Samples overwritten by the newer ones are dropped from the beginning.
+
+        : param start: (int) - position of the first sample.
+        : param end: (int) - position after the last sample.
+
+        : return: (np.ndarray) - mono float32 samples.
+        '''
+        size = len(self._buffer)
+        with self._condition:
+            end = min(end, self._written)
+            start = max(start, end - size, 0)
+            indices = np.arange(start, end) % size
+            return self._buffer[indices]
+
+    def record(self, duration: float) -> np.ndarray:
+        '''
+        Records the next duration seconds of audio.
+
+        : param duration: (float) - duration of the audio in seconds.
+
+        : return: (np.ndarray) - mono float32 samples.
+        '''
+        start = self.get_position()
+        end = start + int(duration * self.sample_rate)
+        print("Recording...")
+        self.wait(end - 1, duration + 1)
+        print("Finished recording.")
+        return self.read(start, end)
+
+    def close(self) -> None:
+        '''
+        Stops the capture and releases the device.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self._stream.stop_stream()
+        self._stream.close()
+        self._audio.terminate()
+
+
+class VoiceActivityDetector():
+    '''
+    Energy-based endpointing of utterances in the audio stream.
+    The speech starts when the frame energy exceeds the adaptive noise floor for the onset time
+    and ends after the trailing silence or at the max utterance length.
+    '''
+
+    def __init__(self, config: dict) -> None:
+        '''
+        Initializes an instance of VoiceActivityDetector.
+
+        : param config: (dict) - VAD configuration object.
+
+        : return: (None) - this function does not return any value.
+        '''
+        self._config = config
+        self._noise_level = config["min_energy"]
+        # perf_counter time of the end of the last utterance, to measure the latency after it
+        self.speech_end_time = None
+
+    def _is_voiced(self, frame: np.ndarray) -> bool:
+        '''
+        Checks the frame energy against the noise floor, adapting the floor by the silent frames.
+
+        : param frame: (np.ndarray) - samples of the frame.
+
+        : return: (bool) - True if the frame contains speech.
+        '''
+        energy = float(np.sqrt(np.mean(frame ** 2)))
+        threshold = max(self._config["min_energy"], self._noise_level * self._config["energy_ratio"])
+        if energy > threshold:
+            return True
+        self._noise_level += self._config["noise_adaptation"] * (energy - self._noise_level)
+        return False
+
+    def listen(self, stream: AudioStream) -> Optional[np.ndarray]:
+        '''
+        Waits for an utterance in the stream and cuts its voiced segment.
+
+        : param stream: (AudioStream) - running microphone stream.
+
+        : return: (Optional[np.ndarray]) - samples of the utterance with the pre-roll or None
+        if no speech started in max_wait_seconds.
+        '''
+        sample_rate = stream.sample_rate
+        frame_size = int(self._config["frame_ms"] * sample_rate / 1000)
+        onset_frames = max(int(self._config["onset_ms"] / self._config["frame_ms"]), 1)
+        silence_frames = max(int(self._config["trailing_silence_ms"] / self._config["frame_ms"]), 1)
+        pre_roll = int(self._config["pre_roll_ms"] * sample_rate / 1000)
+        max_length = int(self._config["max_utterance_seconds"] * sample_rate)
+        wait_end = stream.get_position() + int(self._config["max_wait_seconds"] * sample_rate)
+
+        position = stream.get_position()
+        start, voiced_end, voiced_run, silent_run = None, None, 0, 0
+        while True:
+            if not stream.wait(position + frame_size - 1, self._config["frame_ms"] / 1000 + 1):
+                return None
+            voiced = self._is_voiced(stream.read(position, position + frame_size))
+            position += frame_size
+
+            if start is None:
+                voiced_run = voiced_run + 1 if voiced else 0
+                if voiced_run >= onset_frames:
+                    start = position - voiced_run * frame_size
+                    voiced_end = position
+                    print("Listening...")
+                elif position >= wait_end:
+                    return None
+                continue
+
+            if voiced:
+                voiced_end, silent_run = position, 0
+            else:
+                silent_run += 1
+            if silent_run >= silence_frames or position - start >= max_length:
+                break
+
+        # the end of speech was behind the current stream position by the captured silence
+        self.speech_end_time = time.perf_counter() - (stream.get_position() - voiced_end) / sample_rate
+        print("Finished recording.")
+        return stream.read(start - pre_roll, voiced_end)